@@ -10,13 +10,23 @@ import datetime
 import codecs
 import shutil
 import time
-from configparser import ConfigParser
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+import copy
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort
 from werkzeug.security import generate_password_hash, check_password_hash
 from cryptography.fernet import Fernet
 from functools import wraps
 import utils.config_util as config_util
 from utils import access_log
+from utils import history_store
+from utils import backup_store
+from utils.project_registry import ProjectRegistry
+from utils.config_cache import ProjectConfigCache, files_signature
+from utils.change_notifier import ChangeNotifier
+from utils import compression
+from utils import serialization
+from utils import config_patch
+from utils.write_queue import WriteQueue, EditRejected
+from utils.ini_document import IniDocument
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', str(uuid.uuid4()))
@@ -38,6 +48,20 @@ if not os.path.exists(APP_CONFIG['PROJECTS_DIR']):
 if not os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')):
     os.makedirs(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
 
+# 项目注册表，启动时加载一次，列表请求直接读取内存快照
+project_registry = ProjectRegistry(APP_CONFIG['PROJECTS_DIR'])
+project_registry.load()
+
+# 项目配置缓存，按文件签名校验，写入路径主动失效
+project_config_cache = ProjectConfigCache()
+
+# 配置变更通知，供watch接口推送
+change_notifier = ChangeNotifier()
+
+# 项目列表响应缓存(注册表版本, JSON字节串, ETag, 数据)，注册表版本变化时重新序列化；
+# 整个元组一次赋值替换，并发请求不会读到不同版本的字段
+_projects_response = (None, None, None, None)
+
 # Encryption handler
 fernet = Fernet(APP_CONFIG['ENCRYPTION_KEY'])
 
@@ -56,6 +80,446 @@ def decrypt_data(data):
             return data
     return data
 
+def mark_project_changed(project_id, changed_keys=None):
+    """
+    项目配置文件被写入后调用：提交新的修订号、刷新配置缓存并通知订阅者
+    
+    Args:
+        project_id: 项目ID
+        changed_keys: 变更的配置路径列表，由写入方根据写入前后的内容计算，None表示未知
+    
+    Returns:
+        新的修订号，项目已被删除时返回None
+    """
+    project_config_cache.invalidate(project_id)
+    
+    try:
+        state = read_project_state(project_id)
+    except Exception as e:
+        print(f"读取项目配置时出错: {str(e)}")
+        state = None
+    
+    if state is None:
+        if not os.path.isdir(os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)):
+            # 项目已被删除
+            history_store.drop_project(project_id)
+            backup_store.drop_project(project_id)
+            change_notifier.publish(project_id, None)
+            return None
+    
+    revision = history_store.record_revision(project_id, changed_keys)
+    if state is not None:
+        build_project_snapshot(project_id, state, revision)
+    change_notifier.publish(project_id, changed_keys, revision)
+    return revision
+
+def write_file_durably(path, write):
+    """写入文件并fsync，确保唤醒等待的请求前修改已经落盘"""
+    with open(path, 'w', encoding='utf-8') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+def commit_project_edits(project_id, edits):
+    """
+    写入队列的提交函数：读取一次配置文件，依次应用同一批次的修改，
+    每个被修改的文件只备份、写入和fsync一次，最后提交一个修订
+    
+    Args:
+        project_id: 项目ID
+        edits: 修改函数列表，每个函数接收文档字典并返回结果字典
+    
+    Returns:
+        与edits一一对应的结果列表，失败的修改对应异常对象
+    """
+    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    project_config_path = os.path.join(project_dir, 'project.json')
+    if not os.path.isdir(project_dir) or not os.path.exists(project_config_path):
+        raise EditRejected(f'找不到项目: {project_id}', 404)
+    
+    with open(project_config_path, 'r', encoding='utf-8') as f:
+        project_config = json.load(f)
+    
+    config_dir = get_project_config_dir(project_dir, project_config)
+    os.makedirs(config_dir, exist_ok=True)
+    system_conf_path = os.path.join(config_dir, 'system.conf')
+    config_json_path = os.path.join(config_dir, 'config.json')
+    
+    doc = {
+        'system_config': IniDocument(),
+        'config_json': {},
+        'system_conf_exists': os.path.exists(system_conf_path),
+        'config_json_exists': os.path.exists(config_json_path),
+        'touched': set(),
+        'changed_paths': [],
+        # 本批次开始时已提交的修订号
+        'revision': history_store.get_revision(project_id)
+    }
+    if doc['system_conf_exists']:
+        doc['system_config'].read(system_conf_path, encoding='UTF-8')
+    if doc['config_json_exists']:
+        with open(config_json_path, 'r', encoding='utf-8') as f:
+            doc['config_json'] = json.load(f)
+    
+    # 修改前的叶子节点，在持有写入锁时取得，用于计算本次修订变更的路径；
+    # 不使用共享的配置缓存，其中的快照可能已被并发的读取替换为写入后的内容
+    leaves = copy.deepcopy(project_config_leaves(project_config, doc['system_config'], doc['config_json']))
+    
+    results = []
+    for edit in edits:
+        try:
+            results.append(edit(doc))
+        except Exception as e:
+            results.append(e)
+    
+    changed_paths = []
+    if doc['touched']:
+        changed_paths = config_util.diff_config_leaves(
+            leaves, project_config_leaves(project_config, doc['system_config'], doc['config_json']))
+    
+    if changed_paths:
+        # 项目第一次被修改时先把修改前的配置存入备份库，之后每个修订保存修改后的配置
+        if not backup_store.has_versions(project_id):
+            backup_store.save_version(project_id, doc['revision'], system_conf_path, config_json_path,
+                                      APP_CONFIG.get('BACKUP_CHECKPOINT_INTERVAL', backup_store.CHECKPOINT_INTERVAL))
+        
+        # 每个被修改的文件只写入一次
+        if 'system' in doc['touched']:
+            write_file_durably(system_conf_path, doc['system_config'].write)
+        if 'config' in doc['touched']:
+            write_file_durably(config_json_path, lambda f: json.dump(doc['config_json'], f, indent=4, ensure_ascii=False))
+        revision = mark_project_changed(project_id, changed_paths)
+        
+        if revision is not None:
+            try:
+                backup_store.save_version(project_id, revision, system_conf_path, config_json_path,
+                                          APP_CONFIG.get('BACKUP_CHECKPOINT_INTERVAL', backup_store.CHECKPOINT_INTERVAL))
+            except Exception as e:
+                # 修改已经落盘，备份失败只记录错误
+                print(f"保存配置备份时出错: {str(e)}")
+    else:
+        # 没有修改或修改后内容不变，不写入文件也不产生新的修订
+        revision = doc['revision']
+    
+    for result in results:
+        if isinstance(result, dict):
+            result['revision'] = revision
+    return results
+
+def get_base_revision(project_id, body_revision=None, config_path=None):
+    """
+    获取客户端修改所基于的修订号，If-Match请求头优先于请求体中的revision字段
+    
+    If-Match可以是修订号，也可以是GET接口返回的ETag（完整配置的ETag，PUT时也可以是该配置项的ETag）。
+    ETag与当前配置一致时以当前快照的修订号作为基准，不一致说明读取之后配置已被修改
+    
+    Args:
+        project_id: 项目ID
+        body_revision: 请求体或表单中的revision字段
+        config_path: 单个配置项的修改对应的配置路径
+    
+    Returns:
+        修订号，未指定或为*时返回None，表示不检查冲突
+    
+    Raises:
+        ValueError: 修订号格式无效
+        EditRejected: If-Match中的ETag与当前配置不一致（412）
+    """
+    if request.headers.get('If-Match') is not None:
+        if_match = request.if_match
+        if if_match.star_tag:
+            return None
+        tags = if_match.as_set(include_weak=True)
+        revisions = [int(tag) for tag in tags if tag.isdigit()]
+        if revisions:
+            # 指定了多个修订号时以最早的为准，冲突检查最严格
+            return min(revisions)
+        if not tags:
+            raise ValueError(request.headers['If-Match'])
+        return match_config_etag(project_id, tags, config_path)
+    
+    value = body_revision
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '*':
+            return None
+        if value.startswith('W/'):
+            value = value[2:]
+        value = value.strip('"')
+    if isinstance(value, bool):
+        raise ValueError(value)
+    revision = int(value)
+    if revision < 0:
+        raise ValueError(value)
+    return revision
+
+def match_config_etag(project_id, tags, config_path=None):
+    """
+    将If-Match中的ETag与项目当前配置的ETag比较
+    
+    响应经过压缩或MessagePack编码时ETag带有-gzip、-msgpack等后缀，比较时忽略后缀
+    
+    Returns:
+        匹配时返回当前快照的修订号
+    
+    Raises:
+        EditRejected: 项目不存在（404）或ETag不匹配（412）
+    """
+    snapshot = load_project_snapshot(project_id)
+    if snapshot is None:
+        raise EditRejected(f'找不到项目: {project_id}', 404)
+    
+    current = {snapshot['etag']}
+    if config_path is not None:
+        cached = config_value_response(snapshot, config_path)
+        if cached is not None:
+            current.add(cached[1])
+    
+    if any(tag.split('-', 1)[0] in current for tag in tags):
+        return snapshot['revision']
+    raise EditRejected(
+        f'配置已被修改（当前修订号{snapshot["revision"]}），请重新加载后再提交',
+        412,
+        {'revision': snapshot['revision']}
+    )
+
+def check_base_revision(project_id, doc, base_revision, paths, written=None):
+    """
+    在写入队列中检查修改是否基于过期的配置：客户端读取之后，
+    同一路径（或其父子路径）已被其他请求修改时以412拒绝本次修改
+    
+    Args:
+        project_id: 项目ID
+        doc: 提交函数中的文档字典
+        base_revision: 客户端读取配置时的修订号，None表示不检查
+        paths: 本次修改涉及的点分配置路径列表
+        written: 客户端自己写入过的路径 -> 写入后的修订号；客户端已知这些路径（及其子路径）
+            在该修订时的值，只检查之后的修改
+    """
+    if base_revision is None:
+        return
+    # 按每个路径实际基于的修订号分组检查
+    bases = {}
+    for path in paths:
+        base = max([base_revision] + [revision for other, revision in (written or {}).items()
+                                      if path == other or path.startswith(other + '.')])
+        bases.setdefault(base, []).append(path)
+    conflicts = set()
+    for base, base_paths in bases.items():
+        conflicts.update(history_store.find_conflicts(project_id, base, base_paths))
+    # 同一批次中排在前面、尚未提交修订的修改
+    conflicts.update(path for path in paths
+                     if any(history_store.paths_overlap(path, other) for other in doc['changed_paths']))
+    if conflicts:
+        raise EditRejected(
+            f'配置已被修改（当前修订号{doc["revision"]}），请重新加载后再提交',
+            412,
+            {'revision': doc['revision'], 'conflicts': sorted(conflicts)}
+        )
+
+def parse_written_revisions(value):
+    """
+    解析页面提交的written字段（JSON对象，配置路径 -> 页面写入后的修订号）
+    
+    Raises:
+        ValueError: 格式无效
+    """
+    if not value:
+        return {}
+    written = json.loads(value)
+    if not isinstance(written, dict) or not all(
+            isinstance(path, str) and isinstance(revision, int) and not isinstance(revision, bool)
+            for path, revision in written.items()):
+        raise ValueError('invalid written revisions')
+    return written
+
+def list_project_history(project_id, before=None, limit=20):
+    """
+    分页获取项目的历史版本，只查询索引表，不读取备份文件
+    
+    Args:
+        project_id: 项目ID
+        before: 只返回修订号小于该值的版本
+        limit: 每页数量
+    
+    Returns:
+        (版本列表, 下一页的before参数)，没有更多版本时后者为None
+    """
+    versions = backup_store.list_versions(project_id, before, limit + 1)
+    next_before = versions[limit - 1]['revision'] if len(versions) > limit else None
+    versions = versions[:limit]
+    
+    paths = history_store.get_revision_paths(project_id, [version['revision'] for version in versions])
+    return [{
+        'revision': version['revision'],
+        'created_at': version['created_at'],
+        'system_size': version['system_size'],
+        'config_size': version['config_size'],
+        'changed': paths.get(version['revision'])
+    } for version in versions], next_before
+
+def restore_project_version(project_id, revision, base_revision=None):
+    """
+    将项目配置恢复到指定修订的版本，恢复本身作为一个新的修订提交
+    
+    Args:
+        project_id: 项目ID
+        revision: 要恢复的修订号
+        base_revision: 客户端读取配置时的修订号，之后配置被修改过则拒绝恢复
+    
+    Returns:
+        写入结果字典，包含新的修订号
+    """
+    version = backup_store.read_version(project_id, revision)
+    if version is None:
+        raise EditRejected(f'找不到修订{revision}的备份', 404)
+    
+    system_data, config_data = version
+    
+    def edit(doc):
+        check_base_revision(project_id, doc, base_revision, ['system', 'config'])
+        if system_data is not None:
+            system_config = IniDocument()
+            system_config.read_string(system_data.decode('utf-8'))
+            doc['system_config'] = system_config
+            doc['touched'].add('system')
+            doc['changed_paths'].append('system')
+        if config_data is not None:
+            doc['config_json'] = json.loads(config_data.decode('utf-8'))
+            doc['touched'].add('config')
+            doc['changed_paths'].append('config')
+        return {'restored_revision': revision}
+    
+    return project_writer.submit(project_id, edit)
+
+# 后台按保留策略清理配置备份
+backup_store.start_pruner(
+    APP_CONFIG.get('BACKUP_PRUNE_INTERVAL', 3600),
+    keep_last=APP_CONFIG.get('BACKUP_KEEP_LAST', backup_store.KEEP_LAST),
+    keep_hourly=APP_CONFIG.get('BACKUP_KEEP_HOURLY', backup_store.KEEP_HOURLY),
+    keep_daily=APP_CONFIG.get('BACKUP_KEEP_DAILY', backup_store.KEEP_DAILY)
+)
+
+# 后台批量写入访问日志
+access_log.start_writer(
+    batch_size=APP_CONFIG.get('ACCESS_LOG_BATCH_SIZE', 256),
+    flush_interval=APP_CONFIG.get('ACCESS_LOG_FLUSH_INTERVAL', 0.5),
+    max_queue=APP_CONFIG.get('ACCESS_LOG_QUEUE_SIZE', 10000),
+    block_timeout=APP_CONFIG.get('ACCESS_LOG_BLOCK_TIMEOUT', 0)
+)
+
+# 按项目合并写入，同一项目的读取-修改-写入串行执行
+project_writer = WriteQueue(commit_project_edits, window=APP_CONFIG.get('WRITE_COALESCE_WINDOW', 0.002))
+
+def get_project_config_dir(project_dir, project_config):
+    """
+    获取项目配置文件所在目录（只读，不创建目录也不复制文件）
+    
+    优先使用项目特定的config目录，未迁移的旧项目回退到project.json中的path
+    """
+    project_specific_dir = os.path.join(project_dir, 'config')
+    if os.path.isdir(project_specific_dir):
+        return project_specific_dir
+    return project_config.get('path') or project_specific_dir
+
+def migrate_legacy_project(project_id):
+    """
+    将旧版项目（配置文件位于project.json的path目录）迁移到项目特定的config目录
+    
+    Returns:
+        是否写入了文件
+    """
+    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    project_config_path = os.path.join(project_dir, 'project.json')
+    if not os.path.isdir(project_dir) or not os.path.exists(project_config_path):
+        return False
+    
+    with open(project_config_path, 'r', encoding='utf-8') as f:
+        project_config = json.load(f)
+    
+    project_specific_dir = os.path.join(project_dir, 'config')
+    legacy_dir = project_config.get('path') or project_specific_dir
+    if legacy_dir == project_specific_dir and os.path.isdir(project_specific_dir):
+        return False
+    
+    os.makedirs(project_specific_dir, exist_ok=True)
+    
+    # 如果项目特定目录中没有配置文件，但原路径中有，则复制一份
+    for filename in ('system.conf', 'config.json'):
+        target_path = os.path.join(project_specific_dir, filename)
+        source_path = os.path.join(legacy_dir, filename)
+        if not os.path.exists(target_path) and os.path.exists(source_path):
+            shutil.copy2(source_path, target_path)
+    
+    # 更新项目配置中的路径
+    project_config['path'] = project_specific_dir
+    with open(project_config_path, 'w', encoding='utf-8') as f:
+        json.dump(project_config, f, indent=4)
+    project_registry.upsert(project_id, project_config)
+    project_config_cache.invalidate(project_id)
+    return True
+
+def migrate_legacy_projects():
+    """启动时对所有项目执行一次迁移，之后的GET请求只读取文件"""
+    if not os.path.exists(APP_CONFIG['PROJECTS_DIR']):
+        return
+    for project_id in os.listdir(APP_CONFIG['PROJECTS_DIR']):
+        try:
+            if migrate_legacy_project(project_id):
+                print(f"已迁移项目配置目录: {project_id}")
+        except Exception as e:
+            print(f"迁移项目 {project_id} 时出错: {str(e)}")
+
+migrate_legacy_projects()
+
+def encode_json_body(data):
+    """
+    预先序列化响应数据
+    
+    Returns:
+        (JSON字节串, 基于内容哈希的强ETag)
+    """
+    body = (app.json.dumps(data) + '\n').encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()
+
+def json_bytes_response(body, etag, data=None):
+    """
+    返回预先序列化的JSON，If-None-Match命中时返回不带响应体的304
+    
+    提供data时可按Accept请求头返回MessagePack格式；
+    响应体达到compression.MIN_SIZE时按Accept-Encoding协商压缩，编码和压缩结果均按ETag缓存
+    """
+    mimetype = serialization.JSON_MIMETYPE
+    if data is not None and len(serialization.MIMETYPES) > 1:
+        mimetype = request.accept_mimetypes.best_match(serialization.MIMETYPES, serialization.JSON_MIMETYPE)
+        if mimetype == serialization.MSGPACK_MIMETYPE:
+            body = serialization.encode_msgpack(data, cache_key=etag)
+            etag = f"{etag}-msgpack"
+    
+    encoding = None
+    if len(body) >= compression.MIN_SIZE:
+        encoding = request.accept_encodings.best_match(compression.ENCODINGS)
+    
+    # 不同编码的响应体不同，使用不同的强ETag
+    if encoding:
+        etag = f"{etag}-{encoding}"
+    
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    elif encoding:
+        response = app.response_class(compression.compress(body, encoding, cache_key=etag), mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = app.response_class(body, mimetype=mimetype)
+    if data is not None:
+        response.vary.add('Accept')
+    if len(body) >= compression.MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    return response
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -96,21 +560,7 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    projects = []
-    if os.path.exists(APP_CONFIG['PROJECTS_DIR']):
-        for project_dir in os.listdir(APP_CONFIG['PROJECTS_DIR']):
-            project_path = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_dir)
-            if os.path.isdir(project_path):
-                # Load project details
-                project_config_path = os.path.join(project_path, 'project.json')
-                if os.path.exists(project_config_path):
-                    with open(project_config_path, 'r', encoding='utf-8') as f:
-                        project_config = json.load(f)
-                        projects.append({
-                            'id': project_dir,
-                            'name': project_config.get('name', project_dir),
-                            'path': project_config.get('path', project_path)
-                        })
+    projects = project_registry.list_projects()
     
     return render_template('dashboard.html', projects=projects)
 
@@ -176,6 +626,7 @@ def new_project():
         # Save project config
         with open(os.path.join(project_dir, 'project.json'), 'w', encoding='utf-8') as f:
             json.dump(project_config, f, indent=4)
+        project_registry.upsert(project_id, project_config)
         
         flash(f'Project "{project_name}" created successfully', 'success')
         return redirect(url_for('project_config', project_id=project_id))
@@ -215,29 +666,17 @@ def project_config(project_id):
         flash(f'读取项目配置时出错: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
     
-    # 检查是否有项目特定的配置文件，如果没有，则创建
-    project_specific_dir = os.path.join(project_dir, 'config')
-    if not os.path.exists(project_specific_dir):
-        os.makedirs(project_specific_dir, exist_ok=True)
+    # 旧版项目的迁移在启动时完成，这里只读取配置文件
+    project_specific_dir = get_project_config_dir(project_dir, project_config)
+    project_config['path'] = project_specific_dir
     
     system_conf_path = os.path.join(project_specific_dir, 'system.conf')
     config_json_path = os.path.join(project_specific_dir, 'config.json')
     
-    # 如果项目特定的配置文件不存在，但project_config['path']中有配置文件，则复制一份
-    if not os.path.exists(system_conf_path) and os.path.exists(os.path.join(project_config['path'], 'system.conf')):
-        shutil.copy2(os.path.join(project_config['path'], 'system.conf'), system_conf_path)
-    
-    if not os.path.exists(config_json_path) and os.path.exists(os.path.join(project_config['path'], 'config.json')):
-        shutil.copy2(os.path.join(project_config['path'], 'config.json'), config_json_path)
+    # 先取修订号再读文件，读取期间发生的写入只会导致多报冲突而不会漏报
+    revision = history_store.get_revision(project_id)
     
-    # 更新项目配置中的路径
-    project_config['path'] = project_specific_dir
-    
-    # 保存更新后的项目配置
-    with open(project_config_path, 'w', encoding='utf-8') as f:
-        json.dump(project_config, f, indent=4)
-        
-    system_config = ConfigParser()
+    system_config = IniDocument()
     if os.path.exists(system_conf_path):
         system_config.read(system_conf_path, encoding='UTF-8')
     
@@ -253,6 +692,23 @@ def project_config(project_id):
         # 检查是否是AJAX请求，通过检查X-Requested-With头或Accept头
         is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest' or \
                  'application/json' in request.headers.get('Accept', '')
+        
+        # 页面加载时的修订号，配置在此之后被他人修改的路径不允许覆盖
+        try:
+            base_revision = get_base_revision(project_id, request.form.get('revision'))
+            # 本页面已写入的路径只检查写入之后的修改，不与页面自己的修改冲突
+            written = parse_written_revisions(request.form.get('written'))
+        except ValueError:
+            message = 'Invalid revision'
+            if is_ajax:
+                return jsonify({'success': False, 'message': message}), 400
+            flash(message, 'danger')
+            return redirect(url_for('project_config', project_id=project_id))
+        except EditRejected as e:
+            if is_ajax:
+                return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+            flash(e.message, 'danger')
+            return redirect(url_for('project_config', project_id=project_id))
                  
         # Handle field management operations
         if 'field_management' in request.form:
@@ -270,25 +726,28 @@ def project_config(project_id):
                         if not section or not key:
                             return jsonify({'success': False, 'message': 'Section and key are required'})
                         
-                        # Create backup before making changes
-                        backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                        if os.path.exists(system_conf_path):
-                            shutil.copy2(system_conf_path, f"{system_conf_path}.{backup_time}.bak")
-                        
-                        # Create section if it doesn't exist
-                        if not system_config.has_section(section):
-                            system_config.add_section(section)
-                        
-                        # Set the value
-                        system_config[section][key] = value
+                        def edit(doc):
+                            check_base_revision(project_id, doc, base_revision, [f'system.{section}.{key}'], written)
+                            system_config = doc['system_config']
+                            
+                            # Create section if it doesn't exist
+                            if not system_config.has_section(section):
+                                system_config.add_section(section)
+                            
+                            # Set the value
+                            system_config[section][key] = value
+                            doc['touched'].add('system')
+                            doc['changed_paths'].append(f'system.{section}.{key}')
+                            return {}
                         
-                        # Save system.conf
-                        with open(system_conf_path, 'w', encoding='UTF-8') as f:
-                            system_config.write(f)
+                        # 修改进入写入队列，与同一时间窗口内的其他修改合并写入
+                        result = project_writer.submit(project_id, edit)
                         
                         return jsonify({
                             'success': True, 
-                            'message': f'Field {section}.{key} added/updated successfully'
+                            'message': f'Field {section}.{key} added/updated successfully',
+                            'paths': [f'system.{section}.{key}'],
+                            'revision': result['revision']
                         })
                         
                     elif field_type == 'config':
@@ -299,11 +758,6 @@ def project_config(project_id):
                         if not key:
                             return jsonify({'success': False, 'message': 'Key is required'})
                         
-                        # Create backup before making changes
-                        backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                        if os.path.exists(config_json_path):
-                            shutil.copy2(config_json_path, f"{config_json_path}.{backup_time}.bak")
-                        
                         # Convert value to appropriate type
                         try:
                             # Try to convert to number or boolean if applicable
@@ -319,33 +773,48 @@ def project_config(project_id):
                                 converted_value = value
                         except:
                             converted_value = value
+                        
+                        def edit(doc):
+                            check_base_revision(project_id, doc, base_revision,
+                                                [f'config.{path + "." if path else ""}{key}'], written)
+                            config_json = doc['config_json']
+                            parts = path.split('.') if path else []
+                            
+                            # 第一个新建的中间对象，返回的JSON Patch在这一层添加整个子树
+                            created = None
                             
-                        # Set the value in the JSON structure
-                        if not path:
-                            # Set at root level
-                            config_json[key] = converted_value
-                        else:
                             # Navigate the path
-                            parts = path.split('.')
                             current = config_json
-                            
-                            # Navigate to the correct level
-                            for part in parts:
+                            for i, part in enumerate(parts):
                                 if part not in current:
                                     current[part] = {}
+                                    if created is None:
+                                        created = (parts[:i + 1], current[part])
                                 current = current[part]
                             
                             # Set the value
                             current[key] = converted_value
+                            
+                            if created is None:
+                                patch = [{'op': 'add', 'path': config_patch.json_pointer(parts + [key]),
+                                          'value': converted_value}]
+                            else:
+                                patch = [{'op': 'add', 'path': config_patch.json_pointer(created[0]),
+                                          'value': copy.deepcopy(created[1])}]
+                            
+                            doc['touched'].add('config')
+                            doc['changed_paths'].append(f'config.{path + "." if path else ""}{key}')
+                            return {'patch': patch}
                         
-                        # Save config.json
-                        with open(config_json_path, 'w', encoding='utf-8') as f:
-                            json.dump(config_json, f, indent=4, ensure_ascii=False)
+                        result = project_writer.submit(project_id, edit)
                         
+                        # 只返回本次修改的JSON Patch，页面在本地应用到编辑器中的配置
                         return jsonify({
                             'success': True, 
                             'message': f'Field {path + "." if path else ""}{key} added/updated successfully',
-                            'updated_json': config_json
+                            'patch': result['patch'],
+                            'paths': [f'config.{path + "." if path else ""}{key}'],
+                            'revision': result['revision']
                         })
                 
                 elif action == 'delete':
@@ -357,31 +826,34 @@ def project_config(project_id):
                         if not section or not key:
                             return jsonify({'success': False, 'message': 'Section and key are required'})
                         
-                        # Create backup before making changes
-                        backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                        if os.path.exists(system_conf_path):
-                            shutil.copy2(system_conf_path, f"{system_conf_path}.{backup_time}.bak")
-                        
-                        # Check if section and key exist
-                        if not system_config.has_section(section) or not system_config.has_option(section, key):
-                            return jsonify({'success': False, 'message': f'Field {section}.{key} does not exist'})
-                        
-                        # Remove the option
-                        system_config.remove_option(section, key)
-                        
-                        # If section is now empty, ask if we want to remove it too
-                        if not system_config.options(section):
-                            # You can decide whether to remove empty sections automatically
-                            # For now, we'll keep them
-                            pass
+                        def edit(doc):
+                            check_base_revision(project_id, doc, base_revision, [f'system.{section}.{key}'], written)
+                            system_config = doc['system_config']
+                            
+                            # Check if section and key exist
+                            if not system_config.has_section(section) or not system_config.has_option(section, key):
+                                raise EditRejected(f'Field {section}.{key} does not exist')
+                            
+                            # Remove the option
+                            system_config.remove_option(section, key)
+                            
+                            # If section is now empty, ask if we want to remove it too
+                            if not system_config.options(section):
+                                # You can decide whether to remove empty sections automatically
+                                # For now, we'll keep them
+                                pass
+                            
+                            doc['touched'].add('system')
+                            doc['changed_paths'].append(f'system.{section}.{key}')
+                            return {}
                         
-                        # Save system.conf
-                        with open(system_conf_path, 'w', encoding='UTF-8') as f:
-                            system_config.write(f)
+                        result = project_writer.submit(project_id, edit)
                         
                         return jsonify({
                             'success': True, 
-                            'message': f'Field {section}.{key} deleted successfully'
+                            'message': f'Field {section}.{key} deleted successfully',
+                            'paths': [f'system.{section}.{key}'],
+                            'revision': result['revision']
                         })
                         
                     elif field_type == 'config':
@@ -391,48 +863,59 @@ def project_config(project_id):
                         if not key:
                             return jsonify({'success': False, 'message': 'Key is required'})
                         
-                        # Create backup before making changes
-                        backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                        if os.path.exists(config_json_path):
-                            shutil.copy2(config_json_path, f"{config_json_path}.{backup_time}.bak")
-                        
-                        # Delete the value from the JSON structure
-                        if not path:
-                            # Delete at root level
-                            if key in config_json:
-                                del config_json[key]
-                            else:
-                                return jsonify({'success': False, 'message': f'Field {key} does not exist'})
-                        else:
-                            # Navigate the path
-                            parts = path.split('.')
-                            current = config_json
+                        def edit(doc):
+                            check_base_revision(project_id, doc, base_revision,
+                                                [f'config.{path + "." if path else ""}{key}'], written)
+                            config_json = doc['config_json']
                             
-                            try:
-                                # Navigate to the correct level
-                                for part in parts:
-                                    current = current[part]
-                                
-                                # Delete the key
-                                if key in current:
-                                    del current[key]
+                            # Delete the value from the JSON structure
+                            if not path:
+                                # Delete at root level
+                                if key in config_json:
+                                    del config_json[key]
                                 else:
-                                    return jsonify({'success': False, 'message': f'Field {path}.{key} does not exist'})
-                            except (KeyError, TypeError):
-                                return jsonify({'success': False, 'message': f'Path {path} does not exist'})
+                                    raise EditRejected(f'Field {key} does not exist')
+                            else:
+                                # Navigate the path
+                                parts = path.split('.')
+                                current = config_json
+                                
+                                try:
+                                    # Navigate to the correct level
+                                    for part in parts:
+                                        current = current[part]
+                                    
+                                    # Delete the key
+                                    if key in current:
+                                        del current[key]
+                                    else:
+                                        raise EditRejected(f'Field {path}.{key} does not exist')
+                                except (KeyError, TypeError):
+                                    raise EditRejected(f'Path {path} does not exist')
+                            
+                            doc['touched'].add('config')
+                            doc['changed_paths'].append(f'config.{path + "." if path else ""}{key}')
+                            return {'patch': [{
+                                'op': 'remove',
+                                'path': config_patch.json_pointer((path.split('.') if path else []) + [key])
+                            }]}
                         
-                        # Save config.json
-                        with open(config_json_path, 'w', encoding='utf-8') as f:
-                            json.dump(config_json, f, indent=4, ensure_ascii=False)
+                        result = project_writer.submit(project_id, edit)
                         
                         return jsonify({
                             'success': True, 
                             'message': f'Field {path + "." if path else ""}{key} deleted successfully',
-                            'updated_json': config_json
+                            'patch': result['patch'],
+                            'paths': [f'config.{path + "." if path else ""}{key}'],
+                            'revision': result['revision']
                         })
                 
                 return jsonify({'success': False, 'message': f'Unknown action: {action}'})
                 
+            except EditRejected as e:
+                # 版本冲突返回412，其他无法应用的修改沿用success=False的响应
+                return jsonify({'success': False, 'message': e.message, **e.payload}), \
+                    (412 if e.status_code == 412 else 200)
             except Exception as e:
                 import traceback
                 print(f"Field management error: {traceback.format_exc()}")
@@ -445,35 +928,69 @@ def project_config(project_id):
         # Handle form submission for configuration updates
         if 'update_system_conf' in request.form:
             try:
-                # Create backup before making changes
-                backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                if os.path.exists(system_conf_path):
-                    shutil.copy2(system_conf_path, f"{system_conf_path}.{backup_time}.bak")
+                form = request.form.to_dict()
                 
-                for section in system_config.sections():
-                    for key in system_config[section]:
-                        form_key = f"{section}_{key}"
-                        if form_key in request.form:
-                            value = request.form[form_key]
-                            
-                            # Remove encryption functionality
-                            system_config[section][key] = value
+                def edit(doc):
+                    system_config = doc['system_config']
+                    
+                    # 表单提交的是整个system.conf，只有值与文件中不同的配置项才需要写入
+                    changes = []
+                    for section in system_config.sections():
+                        for key in system_config[section]:
+                            form_key = f"{section}_{key}"
+                            if form_key in form:
+                                # 读取时值会去掉首尾空白，按同样的方式比较
+                                value = form[form_key].strip()
+                                if value != system_config[section][key]:
+                                    changes.append((section, key, value))
+                    
+                    # 没有修改时不备份、不写入，也不产生新的修订
+                    if not changes:
+                        return {'changed': []}
+                    
+                    # 要写入的配置项被他人修改过时视为冲突
+                    changed = [f'system.{section}.{key}' for section, key, _ in changes]
+                    check_base_revision(project_id, doc, base_revision, changed, written)
+                    for section, key, value in changes:
+                        # Remove encryption functionality
+                        system_config[section][key] = value
+                    doc['touched'].add('system')
+                    doc['changed_paths'].extend(changed)
+                    return {'changed': changed}
                 
-                # Save system.conf
-                with open(system_conf_path, 'w', encoding='UTF-8') as f:
-                    system_config.write(f)
+                result = project_writer.submit(project_id, edit)
                 
-                # Update project config
-                with open(os.path.join(project_dir, 'project.json'), 'w', encoding='utf-8') as f:
-                    json.dump(project_config, f, indent=4)
+                # project.json只在内容变化时写入
+                if result['changed']:
+                    with open(project_config_path, 'r', encoding='utf-8') as f:
+                        stored_project_config = json.load(f)
+                    if stored_project_config != project_config:
+                        with open(project_config_path, 'w', encoding='utf-8') as f:
+                            json.dump(project_config, f, indent=4)
+                        project_registry.upsert(project_id, project_config)
                 
                 # 根据请求类型返回不同的响应
-                message = 'System configuration updated successfully'
+                if result['changed']:
+                    message = f'System configuration updated successfully ({len(result["changed"])} changed)'
+                else:
+                    message = 'No changes to save'
                 if is_ajax:
-                    return jsonify({'success': True, 'message': message})
+                    return jsonify({
+                        'success': True,
+                        'message': message,
+                        'changed': result['changed'],
+                        'paths': result['changed'],
+                        'revision': result['revision']
+                    })
                 else:
                     flash(message, 'success')
                     return redirect(url_for('project_config', project_id=project_id))
+            except EditRejected as e:
+                if is_ajax:
+                    return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+                else:
+                    flash(e.message, 'danger')
+                    return redirect(url_for('project_config', project_id=project_id))
             except Exception as e:
                 message = f'Error updating system configuration: {str(e)}'
                 if is_ajax:
@@ -484,11 +1001,6 @@ def project_config(project_id):
         
         if 'update_config_json' in request.form:
             try:
-                # Create backup before making changes
-                backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-                if os.path.exists(config_json_path):
-                    shutil.copy2(config_json_path, f"{config_json_path}.{backup_time}.bak")
-                
                 # Parse the JSON data from the form
                 json_data = request.form.get('config_json_data')
                 if not json_data:
@@ -518,9 +1030,15 @@ def project_config(project_id):
                     # 记录要保存的JSON结构
                     print(f"Saving JSON to {config_json_path}, keys: {list(updated_config.keys() if isinstance(updated_config, dict) else [])}")
                     
-                    with open(config_json_path, 'w', encoding='utf-8') as f:
-                        # 确保ensure_ascii=False以正确处理中文和特殊字符
-                        json.dump(updated_config, f, indent=4, ensure_ascii=False)
+                    def edit(doc):
+                        # 整个config.json被替换，页面加载后任何用户配置的修改都视为冲突
+                        check_base_revision(project_id, doc, base_revision, ['config'], written)
+                        doc['config_json'] = updated_config
+                        doc['touched'].add('config')
+                        doc['changed_paths'].append('config')
+                        return {}
+                    
+                    result = project_writer.submit(project_id, edit)
                     
                     # 直接告知用户更新成功，不尝试重新加载配置
                     message = 'JSON configuration updated successfully'
@@ -530,10 +1048,16 @@ def project_config(project_id):
                     
                     # 根据请求类型返回不同的响应
                     if is_ajax:
-                        return jsonify({'success': True, 'message': message})
+                        return jsonify({'success': True, 'message': message, 'paths': ['config'], 'revision': result['revision']})
                     else:
                         flash(message, 'success')
                         return redirect(url_for('project_config', project_id=project_id))
+                except EditRejected as e:
+                    if is_ajax:
+                        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+                    else:
+                        flash(e.message, 'danger')
+                        return redirect(url_for('project_config', project_id=project_id))
                 except IOError as e:
                     message = f'Error writing to file: {str(e)}'
                     if is_ajax:
@@ -556,7 +1080,8 @@ def project_config(project_id):
     return render_template('project_config.html', 
                           project=project_config,
                           system_config=system_config,
-                          config_json=config_json)
+                          config_json=config_json,
+                          revision=revision)
 
 @app.route('/project/<project_id>/delete', methods=['POST'])
 @login_required
@@ -580,6 +1105,8 @@ def delete_project(project_id):
         # 如果配置文件不存在但目录存在，仍然尝试删除目录
         try:
             shutil.rmtree(project_dir)
+            project_registry.remove(project_id)
+            mark_project_changed(project_id)
             flash(f'已删除项目目录，但找不到项目配置文件', 'warning')
         except Exception as e:
             flash(f'删除项目目录时出错: {str(e)}', 'danger')
@@ -593,12 +1120,16 @@ def delete_project(project_id):
         
         # 删除项目目录
         shutil.rmtree(project_dir)
+        project_registry.remove(project_id)
+        mark_project_changed(project_id)
         
         flash(f'项目 "{project_name}" 已成功删除', 'success')
     except json.JSONDecodeError:
         # 如果无法解析JSON但目录存在，仍然尝试删除目录
         try:
             shutil.rmtree(project_dir)
+            project_registry.remove(project_id)
+            mark_project_changed(project_id)
             flash(f'已删除项目目录，但项目配置文件格式无效', 'warning')
         except Exception as e:
             flash(f'删除项目目录时出错: {str(e)}', 'danger')
@@ -660,8 +1191,8 @@ def log_request(response):
             # 计算响应时间
             response_time = time.time() - getattr(request, 'start_time', time.time())
             
-            # 记录访问日志
-            access_log.log_access(
+            # 放入后台写入队列，不在请求路径上写数据库
+            access_log.enqueue_access(
                 project_id=project_id,
                 ip_address=request.remote_addr,
                 user_agent=request.user_agent.string if hasattr(request, 'user_agent') else None,
@@ -681,38 +1212,41 @@ def log_request(response):
 # 新增API接口：获取所有项目列表
 @app.route('/api/projects', methods=['GET'])
 def api_get_projects():
+    global _projects_response
+    
     # 检查API认证
     api_key = request.headers.get('X-API-Key')
     if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
         return jsonify({'success': False, 'message': '无效的API密钥'}), 401
     
     try:
-        projects = []
-        # 遍历项目目录
-        for project_id in os.listdir(APP_CONFIG['PROJECTS_DIR']):
-            project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
-            project_config_path = os.path.join(project_dir, 'project.json')
-            
-            # 检查是否为目录且包含project.json文件
-            if os.path.isdir(project_dir) and os.path.exists(project_config_path):
-                try:
-                    with open(project_config_path, 'r', encoding='utf-8') as f:
-                        project_config = json.load(f)
-                        projects.append({
-                            'id': project_id,
-                            'name': project_config.get('name', project_id),
-                            'description': project_config.get('description', ''),
-                            'created_at': project_config.get('created_at', ''),
-                            'updated_at': project_config.get('updated_at', '')
-                        })
-                except:
-                    # 跳过无法读取的项目
-                    continue
+        # 注册表未变化时直接返回已序列化的响应；先读版本号再读快照，
+        # 快照在两次读取之间被替换时缓存的版本号偏旧，下次请求重新序列化，不会返回过期的列表
+        version = project_registry.version
+        snapshot = project_registry.list_projects()
+        cached = _projects_response
+        if cached[0] == project_registry.version:
+            return json_bytes_response(*cached[1:])
         
-        return jsonify({
+        # 从注册表快照读取，不再遍历项目目录
+        projects = [
+            {
+                'id': project['id'],
+                'name': project['name'],
+                'description': project['description'],
+                'created_at': project['created_at'],
+                'updated_at': project['updated_at']
+            }
+            for project in snapshot
+        ]
+        
+        data = {
             'success': True, 
             'projects': projects
-        })
+        }
+        body, etag = encode_json_body(data)
+        _projects_response = (version, body, etag, data)
+        return json_bytes_response(body, etag, data)
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取项目列表失败: {str(e)}'}), 500
 
@@ -734,17 +1268,25 @@ def api_get_project_logs(project_id):
     if not os.path.exists(project_dir):
         return jsonify({'success': False, 'message': f'找不到项目: {project_id}'}), 404
     
-    # 获取查询参数
-    limit = request.args.get('limit', 100, type=int)
+    # 获取查询参数，before_id为上一页返回的next_before（更早），after_id为上一页返回的next_after（更新）
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
     offset = request.args.get('offset', 0, type=int)
+    after_time = request.args.get('after_time')
     
-    # 获取访问日志
-    logs = access_log.get_project_access_logs(project_id, limit, offset)
+    # 获取访问日志，游标无效时返回400，避免客户端误以为已经到了最后一页
+    try:
+        before_id = parse_log_cursor(request.args.get('before_id'))
+        after_id = parse_log_cursor(request.args.get('after_id'))
+        logs = access_log.get_project_access_logs(project_id, limit, offset, before_id, after_time, after_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'无效的翻页游标: {str(e)}'}), 400
     
-    return jsonify({
+    data = {
         'success': True,
         'logs': logs
-    })
+    }
+    body, etag = encode_json_body(data)
+    return json_bytes_response(body, etag, data)
 
 # 新增API接口：获取项目访问统计
 @app.route('/api/projects/<project_id>/stats', methods=['GET'])
@@ -764,6 +1306,19 @@ def api_get_project_stats(project_id):
     if not os.path.exists(project_dir):
         return jsonify({'success': False, 'message': f'找不到项目: {project_id}'}), 404
     
+    # 指定from、to或bucket时返回按时间桶汇总的统计
+    rollups = None
+    if any(name in request.args for name in ('from', 'to', 'bucket')):
+        try:
+            rollups = access_log.get_project_rollups(
+                project_id,
+                request.args.get('bucket', 'hour'),
+                parse_stats_time(request.args.get('from')),
+                parse_stats_time(request.args.get('to'))
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'无效的统计范围: {str(e)}'}), 400
+    
     # 获取项目统计
     stats = access_log.get_project_stats(project_id)
     
@@ -771,17 +1326,211 @@ def api_get_project_stats(project_id):
     ip_stats = access_log.get_project_ip_stats(project_id)
     
     if stats:
-        return jsonify({
+        data = {
             'success': True,
             'stats': stats,
             'ip_stats': ip_stats
-        })
+        }
+        if rollups is not None:
+            data['rollups'] = rollups
+        return jsonify(data)
     else:
         return jsonify({
             'success': False,
             'message': '没有找到项目统计数据'
         }), 404
 
+def parse_log_cursor(value):
+    """
+    解析访问日志的翻页游标before_id或after_id
+    
+    Returns:
+        日志ID，参数为空时返回None
+    
+    Raises:
+        ValueError: 游标不是日志ID
+    """
+    if value is None or value == '':
+        return None
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+def parse_stats_time(value):
+    """
+    解析统计范围的时间参数，支持YYYY-mm-dd和YYYY-mm-dd HH:MM:SS（或ISO 8601的T分隔）
+    
+    访问时间按服务器本地时间保存，带时区偏移（如+08:00）的时间先换算为本地时间
+    
+    Returns:
+        不带时区的本地时间datetime，参数为空时返回None
+    
+    Raises:
+        ValueError: 时间格式无效
+    """
+    if not value:
+        return None
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def project_not_found_response(project_id):
+    """项目目录或project.json不存在时的404响应"""
+    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    if not os.path.exists(project_dir):
+        return jsonify({'success': False, 'message': f'找不到项目: {project_id}'}), 404
+    return jsonify({'success': False, 'message': f'找不到项目配置文件'}), 404
+
+def system_config_to_dict(project_config, config_parser):
+    """将INI文档转换为{section: {key: value}}字典，加密的配置项返回解密后的值"""
+    system_config = {}
+    for section in config_parser.sections():
+        system_config[section] = {}
+        for key, value in config_parser.items(section):
+            # 处理加密的配置项
+            form_key = f"{section}_{key}"
+            if form_key in project_config.get('encrypted_keys', []):
+                try:
+                    value = decrypt_data(value)
+                except:
+                    # 如果解密失败，使用加密的值
+                    pass
+            system_config[section][key] = value
+    return system_config
+
+def project_config_leaves(project_config, config_parser, config_json):
+    """获取项目配置的叶子节点，用于比较修改前后变更的路径"""
+    return config_util.flatten_config_leaves(system_config_to_dict(project_config, config_parser), config_json)
+
+def read_project_state(project_id):
+    """
+    从磁盘读取项目配置（不使用缓存）
+    
+    Returns:
+        包含project_config、system_config、config_json以及缓存签名的字典，项目不存在时返回None
+    """
+    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    project_config_path = os.path.join(project_dir, 'project.json')
+    
+    # 检查项目目录和project.json文件是否存在
+    if not os.path.isdir(project_dir) or not os.path.exists(project_config_path):
+        return None
+    
+    # 加载项目元数据
+    with open(project_config_path, 'r', encoding='utf-8') as f:
+        project_config = json.load(f)
+    
+    # 旧版项目的迁移在启动时完成，这里只读取配置文件
+    project_config['path'] = get_project_config_dir(project_dir, project_config)
+    
+    # 加载系统配置和用户配置
+    system_conf_path = os.path.join(project_config['path'], 'system.conf')
+    config_json_path = os.path.join(project_config['path'], 'config.json')
+    
+    # 在读取之前获取文件签名，读取期间文件被修改时缓存会在下次查询时失效
+    cache_paths = (project_config_path, system_conf_path, config_json_path)
+    cache_signature = files_signature(cache_paths)
+    
+    # 处理系统配置
+    system_config = {}
+    if os.path.exists(system_conf_path):
+        config_parser = IniDocument()
+        config_parser.read(system_conf_path, encoding='UTF-8')
+        system_config = system_config_to_dict(project_config, config_parser)
+    
+    # 处理用户配置
+    config_json = {}
+    if os.path.exists(config_json_path):
+        try:
+            with open(config_json_path, 'r', encoding='utf-8') as f:
+                config_json = json.load(f)
+        except:
+            pass
+    
+    return {
+        'project_config': project_config,
+        'system_config': system_config,
+        'config_json': config_json,
+        'cache_paths': cache_paths,
+        'cache_signature': cache_signature
+    }
+
+def build_project_snapshot(project_id, state, revision):
+    """根据读取到的项目配置构建快照并写入缓存"""
+    project_config = state['project_config']
+    system_config = state['system_config']
+    config_json = state['config_json']
+    
+    result = {
+        'success': True, 
+        'revision': revision,
+        'project': {
+            'id': project_id,
+            'name': project_config.get('name', project_id),
+            'description': project_config.get('description', ''),
+            'system_config': system_config,
+            'config_json': config_json
+        }
+    }
+    body, etag = encode_json_body(result)
+    snapshot = {
+        'data': result,
+        'body': body,
+        'etag': etag,
+        'revision': revision,
+        # 扁平化的点分路径索引，单值和批量查询只需一次字典查找
+        'index': config_util.build_config_index(system_config, config_json),
+        # 叶子节点，用于计算两个版本之间变更的路径
+        'leaves': config_util.flatten_config_leaves(system_config, config_json),
+        # 单值查询和增量同步的序列化响应
+        'responses': {}
+    }
+    project_config_cache.store(project_id, state['cache_paths'], state['cache_signature'], snapshot, revision)
+    return snapshot
+
+def load_project_snapshot(project_id):
+    """
+    加载项目配置快照，文件未变化时直接返回缓存
+    
+    Args:
+        project_id: 项目ID
+    
+    Returns:
+        包含data（响应数据）、body（序列化后的JSON）、etag和revision等的字典，项目不存在时返回None
+    """
+    # 文件未变化时直接返回缓存的配置
+    cached = project_config_cache.lookup(project_id)
+    if cached is not None:
+        return cached
+    
+    revision = history_store.get_revision(project_id)
+    state = read_project_state(project_id)
+    if state is None:
+        return None
+    return build_project_snapshot(project_id, state, revision)
+
+def config_value_response(snapshot, config_path):
+    """
+    获取单个配置项的响应，同一版本内重复请求直接返回已序列化的响应
+    
+    Returns:
+        (JSON字节串, ETag, 响应数据)，配置项不存在时返回None
+    """
+    cached = snapshot['responses'].get(config_path)
+    if cached is None:
+        if config_path not in snapshot['index']:
+            return None
+        
+        data = {
+            'success': True, 
+            'config_path': config_path,
+            'config_value': snapshot['index'][config_path]
+        }
+        cached = encode_json_body(data) + (data,)
+        snapshot['responses'][config_path] = cached
+    return cached
+
 # 新增API接口：获取项目配置详情
 @app.route('/api/projects/<project_id>/config', methods=['GET'])
 def api_get_project_config(project_id):
@@ -794,91 +1543,38 @@ def api_get_project_config(project_id):
     if not project_id:
         return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
     
-    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
-    
-    # 检查项目目录是否存在
-    if not os.path.exists(project_dir):
-        return jsonify({'success': False, 'message': f'找不到项目: {project_id}'}), 404
-    
-    project_config_path = os.path.join(project_dir, 'project.json')
+    try:
+        snapshot = load_project_snapshot(project_id)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'获取项目配置失败: {str(e)}'}), 500
     
-    # 检查project.json文件是否存在
-    if not os.path.exists(project_config_path):
-        return jsonify({'success': False, 'message': f'找不到项目配置文件'}), 404
+    if snapshot is None:
+        return project_not_found_response(project_id)
     
-    try:
-        # 加载项目元数据
-        with open(project_config_path, 'r', encoding='utf-8') as f:
-            project_config = json.load(f)
-        
-        # 确保使用项目特定的配置目录
-        project_specific_dir = os.path.join(project_dir, 'config')
-        if not os.path.exists(project_specific_dir):
-            os.makedirs(project_specific_dir, exist_ok=True)
-        
-        # 如果project_config['path']不是项目特定目录，则更新
-        if project_config['path'] != project_specific_dir:
-            # 如果项目特定目录中没有配置文件，但原路径中有，则复制一份
-            system_conf_path = os.path.join(project_specific_dir, 'system.conf')
-            config_json_path = os.path.join(project_specific_dir, 'config.json')
-            
-            if not os.path.exists(system_conf_path) and os.path.exists(os.path.join(project_config['path'], 'system.conf')):
-                shutil.copy2(os.path.join(project_config['path'], 'system.conf'), system_conf_path)
-            
-            if not os.path.exists(config_json_path) and os.path.exists(os.path.join(project_config['path'], 'config.json')):
-                shutil.copy2(os.path.join(project_config['path'], 'config.json'), config_json_path)
-            
-            # 更新项目配置中的路径
-            project_config['path'] = project_specific_dir
-            # 保存更新后的项目配置
-            with open(project_config_path, 'w', encoding='utf-8') as f:
-                json.dump(project_config, f, indent=4)
-        
-        # 加载系统配置和用户配置
-        system_conf_path = os.path.join(project_config['path'], 'system.conf')
-        config_json_path = os.path.join(project_config['path'], 'config.json')
-        
-        # 处理系统配置
-        system_config = {}
-        if os.path.exists(system_conf_path):
-            config_parser = ConfigParser()
-            config_parser.read(system_conf_path, encoding='UTF-8')
+    # 指定since时只返回该修订之后变更或删除的配置路径
+    since = request.args.get('since', type=int)
+    if since is not None:
+        cached = snapshot['responses'].get(('since', since))
+        if cached is None:
+            paths = history_store.get_changed_paths(project_id, since)
+            if paths is None:
+                # 历史已被压缩或变更范围未知，返回完整快照
+                return json_bytes_response(snapshot['body'], snapshot['etag'], snapshot['data'])
             
-            # 将ConfigParser对象转换为字典
-            for section in config_parser.sections():
-                system_config[section] = {}
-                for key, value in config_parser[section].items():
-                    # 处理加密的配置项
-                    form_key = f"{section}_{key}"
-                    if form_key in project_config.get('encrypted_keys', []):
-                        try:
-                            value = decrypt_data(value)
-                        except:
-                            # 如果解密失败，使用加密的值
-                            pass
-                    system_config[section][key] = value
-        
-        # 处理用户配置
-        config_json = {}
-        if os.path.exists(config_json_path):
-            try:
-                with open(config_json_path, 'r', encoding='utf-8') as f:
-                    config_json = json.load(f)
-            except:
-                pass
-        
-        return jsonify({
-            'success': True, 
-            'project': {
-                'id': project_id,
-                'name': project_config.get('name', project_id),
-                'description': project_config.get('description', ''),
-                'system_config': system_config,
-                'config_json': config_json
+            index = snapshot['index']
+            data = {
+                'success': True,
+                'full': False,
+                'since': since,
+                'revision': snapshot['revision'],
+                'changed': {path: index[path] for path in sorted(paths) if path in index},
+                'deleted': [path for path in sorted(paths) if path not in index]
             }
-        })
-    except Exception as e:
-        return jsonify({'success': False, 'message': f'获取项目配置失败: {str(e)}'}), 500
+            cached = encode_json_body(data) + (data,)
+            snapshot['responses'][('since', since)] = cached
+        return json_bytes_response(*cached)
+    
+    return json_bytes_response(snapshot['body'], snapshot['etag'], snapshot['data'])
 
 # 新增API接口：获取特定配置项
 @app.route('/api/projects/<project_id>/config/<path:config_path>', methods=['GET'])
@@ -894,37 +1590,63 @@ def api_get_config_value(project_id, config_path):
     if not config_path:
         return jsonify({'success': False, 'message': '配置路径不能为空'}), 400
     
-    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    try:
+        snapshot = load_project_snapshot(project_id)
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'获取配置项失败: {str(e)}'}), 500
     
-    # 检查项目目录是否存在
-    if not os.path.exists(project_dir):
-        return jsonify({'success': False, 'message': f'找不到项目: {project_id}'}), 404
+    if snapshot is None:
+        return project_not_found_response(project_id)
     
-    project_config_path = os.path.join(project_dir, 'project.json')
+    # 扁平化索引中查找，路径不存在时返回404
+    cached = config_value_response(snapshot, config_path)
+    if cached is None:
+        return jsonify({'success': False, 'message': f'找不到配置项: {config_path}'}), 404
     
-    # 检查project.json文件是否存在
-    if not os.path.exists(project_config_path):
-        return jsonify({'success': False, 'message': f'找不到项目配置文件'}), 404
+    return json_bytes_response(*cached)
+
+# 新增API接口：批量获取多个配置项
+@app.route('/api/projects/<project_id>/config/values', methods=['POST'])
+def api_get_config_values(project_id):
+    # 检查API认证
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
+        return jsonify({'success': False, 'message': '无效的API密钥'}), 401
+    
+    # 验证项目ID
+    if not project_id:
+        return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
+    
+    # 获取请求数据
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('keys'), list):
+        return jsonify({'success': False, 'message': '请求数据无效，需要包含keys列表'}), 400
     
     try:
-        # 加载项目元数据
-        with open(project_config_path, 'r', encoding='utf-8') as f:
-            project_config = json.load(f)
-        
-        # 调用配置工具获取配置值
-        config_value = config_util.get_config_value(config_path, project_path=project_config['path'])
-        
-        # 如果配置值为None，可能是路径不存在
-        if config_value is None:
-            return jsonify({'success': False, 'message': f'找不到配置项: {config_path}'}), 404
-        
-        return jsonify({
-            'success': True, 
-            'config_path': config_path,
-            'config_value': config_value
-        })
+        # 只加载一次项目配置，所有配置项都基于同一个快照解析
+        snapshot = load_project_snapshot(project_id)
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取配置项失败: {str(e)}'}), 500
+    
+    if snapshot is None:
+        return project_not_found_response(project_id)
+    
+    index = snapshot['index']
+    values = {}
+    missing = []
+    for key in data['keys']:
+        if isinstance(key, str) and key in index:
+            values[key] = index[key]
+        else:
+            missing.append(key)
+    
+    result = {
+        'success': True,
+        'values': values,
+        'missing': missing
+    }
+    body, etag = encode_json_body(result)
+    return json_bytes_response(body, etag, result)
 
 # 新增API接口：更新特定配置项
 @app.route('/api/projects/<project_id>/config/<path:config_path>', methods=['PUT'])
@@ -947,6 +1669,14 @@ def api_update_config_value(project_id, config_path):
     
     config_value = data['value']
     
+    # 指定If-Match或revision时，该配置项在此修订之后被修改过则返回412
+    try:
+        base_revision = get_base_revision(project_id, data.get('revision'), config_path)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '无效的修订号'}), 400
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+    
     project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
     
     # 检查项目目录是否存在
@@ -959,89 +1689,45 @@ def api_update_config_value(project_id, config_path):
     if not os.path.exists(project_config_path):
         return jsonify({'success': False, 'message': f'找不到项目配置文件'}), 404
     
-    try:
-        # 加载项目元数据
-        with open(project_config_path, 'r', encoding='utf-8') as f:
-            project_config = json.load(f)
-        
-        # 确保使用项目特定的配置目录
-        project_specific_dir = os.path.join(project_dir, 'config')
-        if not os.path.exists(project_specific_dir):
-            os.makedirs(project_specific_dir, exist_ok=True)
-        
-        # 如果project_config['path']不是项目特定目录，则更新
-        if project_config['path'] != project_specific_dir:
-            # 如果项目特定目录中没有配置文件，但原路径中有，则复制一份
-            system_conf_path = os.path.join(project_specific_dir, 'system.conf')
-            config_json_path = os.path.join(project_specific_dir, 'config.json')
-            
-            if not os.path.exists(system_conf_path) and os.path.exists(os.path.join(project_config['path'], 'system.conf')):
-                shutil.copy2(os.path.join(project_config['path'], 'system.conf'), system_conf_path)
-            
-            if not os.path.exists(config_json_path) and os.path.exists(os.path.join(project_config['path'], 'config.json')):
-                shutil.copy2(os.path.join(project_config['path'], 'config.json'), config_json_path)
-            
-            # 更新项目配置中的路径
-            project_config['path'] = project_specific_dir
-            # 保存更新后的项目配置
-            with open(project_config_path, 'w', encoding='utf-8') as f:
-                json.dump(project_config, f, indent=4)
-        
-        # 加载系统配置和用户配置
-        system_conf_path = os.path.join(project_config['path'], 'system.conf')
-        config_json_path = os.path.join(project_config['path'], 'config.json')
-        
-        # 解析配置路径
-        parts = config_path.split('.')
+    # 解析配置路径
+    parts = config_path.split('.')
+    
+    # 支持system.section.key格式更新system.conf
+    if parts[0] == 'system' and len(parts) == 3:
+        section, key = parts[1:]
         
-        # 支持system.section.key格式更新system.conf
-        if parts[0] == 'system' and len(parts) == 3:
-            section, key = parts[1:]
-            system_conf_path = os.path.join(project_config['path'], 'system.conf')
-            
+        def edit(doc):
             # 检查system.conf文件是否存在
-            if not os.path.exists(system_conf_path):
-                return jsonify({'success': False, 'message': f'找不到系统配置文件'}), 404
+            if not doc['system_conf_exists']:
+                raise EditRejected('找不到系统配置文件', 404)
             
-            # 加载系统配置
-            system_config = ConfigParser()
-            system_config.read(system_conf_path, encoding='UTF-8')
+            check_base_revision(project_id, doc, base_revision, [config_path])
+            system_config = doc['system_config']
             
             # 检查区段和键是否存在
             if section not in system_config.sections():
-                return jsonify({'success': False, 'message': f'找不到配置区段: {section}'}), 404
+                raise EditRejected(f'找不到配置区段: {section}', 404)
             if key not in system_config[section]:
-                return jsonify({'success': False, 'message': f'找不到配置键: {key}'}), 404
-            
-            # 创建备份
-            backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-            shutil.copy2(system_conf_path, f"{system_conf_path}.{backup_time}.bak")
+                raise EditRejected(f'找不到配置键: {key}', 404)
             
             # 更新配置值
             system_config[section][key] = str(config_value)
+            doc['touched'].add('system')
+            doc['changed_paths'].append(config_path)
+            return {}
             
-            # 保存系统配置
-            with open(system_conf_path, 'w', encoding='UTF-8') as f:
-                system_config.write(f)
-                
-        # 支持config.path.to.key格式更新config.json
-        elif parts[0] == 'config' and len(parts) > 1:
-            config_json_path = os.path.join(project_config['path'], 'config.json')
-            
+    # 支持config.path.to.key格式更新config.json
+    elif parts[0] == 'config' and len(parts) > 1:
+        
+        def edit(doc):
             # 检查config.json文件是否存在
-            if not os.path.exists(config_json_path):
-                return jsonify({'success': False, 'message': f'找不到用户配置文件'}), 404
-            
-            # 加载用户配置
-            with open(config_json_path, 'r', encoding='utf-8') as f:
-                config_json = json.load(f)
+            if not doc['config_json_exists']:
+                raise EditRejected('找不到用户配置文件', 404)
             
-            # 创建备份
-            backup_time = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
-            shutil.copy2(config_json_path, f"{config_json_path}.{backup_time}.bak")
+            check_base_revision(project_id, doc, base_revision, [config_path])
             
             # 递归更新嵌套配置
-            current = config_json
+            current = doc['config_json']
             for i, part in enumerate(parts[1:]):
                 if i == len(parts) - 2:  # 最后一个键
                     current[part] = config_value
@@ -1050,21 +1736,227 @@ def api_update_config_value(project_id, config_path):
                     current[part] = {}
                 current = current[part]
             
-            # 保存用户配置
-            with open(config_json_path, 'w', encoding='utf-8') as f:
-                json.dump(config_json, f, indent=4, ensure_ascii=False)
-        else:
-            return jsonify({'success': False, 'message': f'不支持的配置路径格式: {config_path}'}), 400
+            doc['touched'].add('config')
+            doc['changed_paths'].append(config_path)
+            return {}
+    else:
+        return jsonify({'success': False, 'message': f'不支持的配置路径格式: {config_path}'}), 400
+    
+    try:
+        # 修改进入写入队列，与同一时间窗口内的其他修改合并写入
+        result = project_writer.submit(project_id, edit)
         
         return jsonify({
             'success': True, 
             'message': '配置更新成功',
             'config_path': config_path,
-            'config_value': config_value
+            'config_value': config_value,
+            'revision': result['revision']
         })
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
     except Exception as e:
         return jsonify({'success': False, 'message': f'更新配置项失败: {str(e)}'}), 500
 
+# 新增API接口：批量修改配置项，一次读取、备份和写入
+@app.route('/api/projects/<project_id>/config', methods=['PATCH'])
+def api_patch_project_config(project_id):
+    # 检查API认证
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
+        return jsonify({'success': False, 'message': '无效的API密钥'}), 401
+    
+    # 验证项目ID
+    if not project_id:
+        return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
+    
+    # 获取请求数据，支持操作列表或{"operations": [...]}
+    data = request.get_json(silent=True)
+    operations = data if isinstance(data, list) else (data or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'message': '请求数据无效，需要包含operations列表'}), 400
+    
+    # 指定If-Match或revision时，任一被修改的配置项在此修订之后被修改过则整批拒绝
+    try:
+        base_revision = get_base_revision(project_id, data.get('revision') if isinstance(data, dict) else None)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': '无效的修订号'}), 400
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+    
+    project_dir = os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)
+    project_config_path = os.path.join(project_dir, 'project.json')
+    if not os.path.isdir(project_dir) or not os.path.exists(project_config_path):
+        return project_not_found_response(project_id)
+    
+    def edit(doc):
+        # 在副本上应用全部操作，任一操作失败时不影响文件和同一批次的其他修改
+        system_config = copy.deepcopy(doc['system_config'])
+        config_json = copy.deepcopy(doc['config_json'])
+        ok, results, touched, changed_paths = config_patch.apply_operations(system_config, config_json, operations)
+        if not ok:
+            raise EditRejected('部分操作无法应用，未写入任何修改', 400, {'results': results})
+        check_base_revision(project_id, doc, base_revision, changed_paths)
+        
+        doc['system_config'] = system_config
+        doc['config_json'] = config_json
+        doc['touched'].update(touched)
+        doc['changed_paths'].extend(changed_paths)
+        return {'results': results}
+    
+    try:
+        # 所有操作作为一个修改进入写入队列，每个被修改的文件只备份和写入一次
+        result = project_writer.submit(project_id, edit)
+        
+        return jsonify({
+            'success': True,
+            'message': '配置更新成功',
+            'revision': result['revision'],
+            'results': result['results']
+        })
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'批量更新配置失败: {str(e)}'}), 500
+
+# 新增API接口：分页获取项目配置的历史版本
+@app.route('/api/projects/<project_id>/history', methods=['GET'])
+def api_get_project_history(project_id):
+    # 检查API认证
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
+        return jsonify({'success': False, 'message': '无效的API密钥'}), 401
+    
+    # 验证项目ID
+    if not project_id:
+        return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
+    
+    if not os.path.isdir(os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)):
+        return project_not_found_response(project_id)
+    
+    # 按修订号翻页，before为上一页返回的next_before
+    before = request.args.get('before', type=int)
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    
+    try:
+        versions, next_before = list_project_history(project_id, before, limit)
+        
+        return jsonify({
+            'success': True,
+            'revision': history_store.get_revision(project_id),
+            'versions': versions,
+            'next_before': next_before
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'获取配置历史失败: {str(e)}'}), 500
+
+# 新增API接口：将项目配置恢复到指定修订
+@app.route('/api/projects/<project_id>/restore/<int:revision>', methods=['POST'])
+def api_restore_project_config(project_id, revision):
+    # 检查API认证
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
+        return jsonify({'success': False, 'message': '无效的API密钥'}), 401
+    
+    # 验证项目ID
+    if not project_id:
+        return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
+    
+    if not os.path.isdir(os.path.join(APP_CONFIG['PROJECTS_DIR'], project_id)):
+        return project_not_found_response(project_id)
+    
+    # 指定If-Match时，配置在该修订之后被修改过则拒绝恢复
+    try:
+        base_revision = get_base_revision(project_id)
+    except ValueError:
+        return jsonify({'success': False, 'message': '无效的修订号'}), 400
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+    
+    try:
+        result = restore_project_version(project_id, revision, base_revision)
+        
+        return jsonify({
+            'success': True,
+            'message': f'已恢复到修订{revision}',
+            'restored_revision': revision,
+            'revision': result['revision']
+        })
+    except EditRejected as e:
+        return jsonify({'success': False, 'message': e.message, **e.payload}), e.status_code
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'恢复配置失败: {str(e)}'}), 500
+
+# 新增API接口：通过Server-Sent Events推送配置变更
+@app.route('/api/projects/<project_id>/watch', methods=['GET'])
+def api_watch_project(project_id):
+    # 检查API认证
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != APP_CONFIG.get('API_KEY', 'your-api-key-here'):
+        return jsonify({'success': False, 'message': '无效的API密钥'}), 401
+    
+    # 验证项目ID
+    if not project_id:
+        return jsonify({'success': False, 'message': '项目ID不能为空'}), 400
+    
+    if project_registry.get(project_id) is None:
+        return project_not_found_response(project_id)
+    
+    # 事件ID即项目修订号，断线重连时从Last-Event-ID继续推送
+    current_id = history_store.get_revision(project_id)
+    last_id = request.headers.get('Last-Event-ID', request.args.get('last_event_id', ''))
+    try:
+        last_id = int(last_id)
+    except ValueError:
+        last_id = current_id
+    
+    # 错过的修订已不在通知器的缓冲中时（如服务重启），通知客户端重新拉取完整配置
+    backlog = []
+    resync = False
+    if last_id != current_id:
+        backlog, missed = change_notifier.wait(project_id, last_id, timeout=0)
+        resync = last_id > current_id or missed or not backlog or backlog[0]['id'] != last_id + 1
+        if resync:
+            backlog = []
+            last_id = current_id
+    
+    heartbeat = APP_CONFIG.get('WATCH_HEARTBEAT', 15)
+    
+    def format_event(event_type, data, event_id=None):
+        message = f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        if event_id is not None:
+            message = f"id: {event_id}\n" + message
+        return message
+    
+    def stream():
+        nonlocal last_id
+        yield "retry: 3000\n\n"
+        yield format_event('hello', {'project_id': project_id, 'id': last_id}, last_id)
+        if resync:
+            yield format_event('resync', {'project_id': project_id, 'id': last_id}, last_id)
+        for event in backlog:
+            yield format_event('change', event, event['id'])
+            last_id = event['id']
+        while True:
+            # 在条件变量上等待，有变更时立即唤醒，超时发送心跳注释保持连接
+            events, missed = change_notifier.wait(project_id, last_id, timeout=heartbeat)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            if missed:
+                # 部分事件已被淘汰，通知客户端重新拉取完整配置
+                yield format_event('resync', {'project_id': project_id, 'id': events[-1]['id']}, events[-1]['id'])
+            else:
+                for event in events:
+                    yield format_event('change', event, event['id'])
+            last_id = events[-1]['id']
+    
+    response = app.response_class(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # 禁止反向代理缓冲事件流
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # 项目访问日志页面
 @app.route('/project/<project_id>/logs', methods=['GET'])
 @login_required
@@ -1097,25 +1989,43 @@ def project_logs(project_id):
         if 'id' not in project_config:
             project_config['id'] = project_id
             
-        # 获取分页参数
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
-        # 获取项目访问日志
+        # 获取分页参数，按游标翻页，任一页的查询代价相同
+        after_time = request.args.get('after_time') or None
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    except Exception as e:
+        flash(f'读取项目访问日志时出错: {str(e)}', 'danger')
+        return redirect(url_for('dashboard'))
+    
+    # 获取项目访问日志，游标无效时返回400
+    try:
+        before_id = parse_log_cursor(request.args.get('before_id'))
+        after_id = parse_log_cursor(request.args.get('after_id'))
         logs = access_log.get_project_access_logs(
             project_id, 
             limit=per_page, 
-            offset=(page-1)*per_page
+            before_id=before_id,
+            after_time=after_time,
+            after_id=after_id
         )
-        
+    except ValueError as e:
+        abort(400, description=f'无效的翻页游标: {str(e)}')
+    
+    try:
         # 获取项目统计
         stats = access_log.get_project_stats(project_id)
         
         # 获取IP统计
         ip_stats = access_log.get_project_ip_stats(project_id)
         
-        # 计算总页数
-        total_pages = (logs['total'] + per_page - 1) // per_page
+        # 访问趋势图表读取汇总表，默认显示最近24小时（按小时）
+        bucket = request.args.get('bucket', 'hour')
+        if bucket not in access_log.BUCKETS:
+            bucket = 'hour'
+        chart_span = {'minute': datetime.timedelta(hours=1),
+                      'hour': datetime.timedelta(days=1),
+                      'day': datetime.timedelta(days=30)}[bucket]
+        now = datetime.datetime.now()
+        rollups = access_log.get_project_rollups(project_id, bucket, now - chart_span, now)
         
         return render_template(
             'project_logs.html',
@@ -1123,14 +2033,60 @@ def project_logs(project_id):
             logs=logs['logs'],
             stats=stats,
             ip_stats=ip_stats,
-            page=page,
+            rollups=rollups,
+            before_id=before_id,
+            after_id=after_id,
+            after_time=after_time,
+            next_before=logs['next_before'],
+            next_after=logs['next_after'],
             per_page=per_page,
-            total_pages=total_pages,
             total_records=logs['total']
         )
     except Exception as e:
         flash(f'读取项目访问日志时出错: {str(e)}', 'danger')
         return redirect(url_for('dashboard'))
 
+@app.route('/project/<project_id>/history', methods=['GET'])
+@login_required
+def project_history(project_id):
+    project = project_registry.get(project_id)
+    if project is None:
+        flash(f'找不到项目: {project_id}', 'danger')
+        return redirect(url_for('dashboard'))
+    
+    before = request.args.get('before', type=int)
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    
+    try:
+        versions, next_before = list_project_history(project_id, before, per_page)
+    except Exception as e:
+        flash(f'读取配置历史时出错: {str(e)}', 'danger')
+        return redirect(url_for('project_config', project_id=project_id))
+    
+    return render_template(
+        'project_history.html',
+        project=project,
+        versions=versions,
+        revision=history_store.get_revision(project_id),
+        before=before,
+        next_before=next_before,
+        per_page=per_page
+    )
+
+@app.route('/project/<project_id>/restore/<int:revision>', methods=['POST'])
+@login_required
+def project_restore(project_id, revision):
+    try:
+        base_revision = get_base_revision(project_id, request.form.get('revision'))
+        result = restore_project_version(project_id, revision, base_revision)
+        flash(f'已恢复到修订{revision}（当前修订号{result["revision"]}）', 'success')
+    except ValueError:
+        flash('无效的修订号', 'danger')
+    except EditRejected as e:
+        flash(e.message, 'danger')
+    except Exception as e:
+        flash(f'恢复配置时出错: {str(e)}', 'danger')
+    return redirect(url_for('project_history', project_id=project_id))
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5500) 
\ No newline at end of file
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+访问日志查询的基准测试（迁移添加的索引）
+
+构造分属多个项目的日志表，对其中一个项目分别在删除和保留迁移添加的索引时
+测量日志页、日志总数、IP统计和唯一IP数四个查询的耗时
+
+    python benchmarks/bench_access_log_indexes.py --rows 1000000 --projects 10
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+INDEXES = {
+    'idx_access_logs_project_time_id': 'ON access_logs (project_id, access_time, id)',
+    'idx_access_logs_project_ip': 'ON access_logs (project_id, ip_address)'
+}
+
+QUERIES = [
+    ('logs page (ORDER BY access_time LIMIT 20)', '''
+     SELECT * FROM access_logs WHERE project_id = ?
+     ORDER BY access_time DESC, id DESC LIMIT 20'''),
+    ('COUNT(*) total', 'SELECT COUNT(*) FROM access_logs WHERE project_id = ?'),
+    ('IP stats (GROUP BY ip_address)', '''
+     SELECT ip_address, COUNT(*) AS count FROM access_logs WHERE project_id = ?
+     GROUP BY ip_address ORDER BY count DESC LIMIT 10'''),
+    ('COUNT(DISTINCT ip_address)', 'SELECT COUNT(DISTINCT ip_address) FROM access_logs WHERE project_id = ?')
+]
+
+
+def populate(conn, access_log, rows, projects):
+    start = datetime.datetime.now() - datetime.timedelta(days=30)
+    for offset in range(0, rows, 100000):
+        batch = []
+        for i in range(offset, min(rows, offset + 100000)):
+            row = list(access_log._access_row(f'project-{random.randrange(projects)}',
+                                              f'10.0.{random.randrange(8)}.{random.randrange(256)}',
+                                              endpoint='/api/projects/bench/config'))
+            row[1] = (start + datetime.timedelta(seconds=i * 2)).strftime('%Y-%m-%d %H:%M:%S')
+            batch.append(row)
+        conn.executemany('''
+        INSERT INTO access_logs (
+            project_id, access_time, ip_address, user_agent, request_method,
+            endpoint, params, status_code, response_time, user_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        conn.commit()
+
+
+def time_queries(conn, repeat=5):
+    results = []
+    for _, sql in QUERIES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, ('project-0',)).fetchall()
+        results.append((time.perf_counter() - start) / repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='访问日志查询的基准测试')
+    parser.add_argument('--rows', type=int, default=1000000, help='日志总数')
+    parser.add_argument('--projects', type=int, default=10, help='项目数量')
+    args = parser.parse_args()
+
+    access_log = sandbox.load_module(tempfile.mkdtemp(prefix='bench-indexes-'), 'utils.access_log')
+    conn = sqlite3.connect(access_log.DB_PATH)
+    populate(conn, access_log, args.rows, args.projects)
+
+    for name in INDEXES:
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+    before = time_queries(conn)
+    for name, definition in INDEXES.items():
+        conn.execute(f'CREATE INDEX {name} {definition}')
+    conn.commit()
+    after = time_queries(conn)
+    conn.close()
+
+    print(f"{args.rows} rows over {args.projects} projects, one project queried")
+    for (name, _), without_index, with_index in zip(QUERIES, before, after):
+        print(f"  {name:<44} {without_index * 1000:8.2f} ms -> {with_index * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+访问日志并发读写的基准测试（连接池 + WAL）
+
+writers个线程持续调用log_access，readers个线程持续读取日志列表和项目统计，
+比较两种方式的吞吐量和"database is locked"错误数：
+
+- 每次调用新建连接、回滚日志模式（改用连接池之前的做法）
+- 连接池 + WAL（当前实现）
+
+    python benchmarks/bench_access_log_pool.py --seconds 3 --writers 4 --readers 4
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import builtins
+import tempfile
+import threading
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+PROJECT_IDS = [f'bench{i}' for i in range(8)]
+
+
+def connect_per_call(access_log):
+    """改用连接池之前的做法：每次调用新建连接，用完关闭"""
+    @contextmanager
+    def connection():
+        conn = sqlite3.connect(access_log.DB_PATH)
+        conn.create_function('hll_update', 2, access_log.hyperloglog.update, deterministic=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+    return connection
+
+
+def run(access_log, seconds, writers, readers):
+    """并发读写seconds秒，返回(写入次数, 读取次数, 错误数, 其中database is locked的次数)"""
+    counts = {'writes': 0, 'reads': 0}
+    errors = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    # 访问日志模块出错时只打印，不抛出异常；拦截print统计错误
+    original_print = builtins.print
+    def capture(*args, **kwargs):
+        with lock:
+            errors.append(' '.join(str(arg) for arg in args))
+    builtins.print = capture
+
+    def writer():
+        done = 0
+        while not stop.is_set():
+            project_id = random.choice(PROJECT_IDS)
+            ip = f'10.0.{random.randrange(256)}.{random.randrange(256)}'
+            access_log.log_access(project_id, ip, endpoint=f'/api/projects/{project_id}/config')
+            done += 1
+        with lock:
+            counts['writes'] += done
+
+    def reader():
+        done = 0
+        while not stop.is_set():
+            project_id = random.choice(PROJECT_IDS)
+            access_log.get_project_access_logs(project_id, limit=50)
+            access_log.get_project_stats(project_id)
+            done += 1
+        with lock:
+            counts['reads'] += done
+
+    threads = ([threading.Thread(target=writer) for _ in range(writers)] +
+               [threading.Thread(target=reader) for _ in range(readers)])
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        builtins.print = original_print
+
+    locked = sum('locked' in error for error in errors)
+    return counts['writes'], counts['reads'], len(errors), locked
+
+
+def main():
+    parser = argparse.ArgumentParser(description='访问日志并发读写的基准测试')
+    parser.add_argument('--seconds', type=float, default=3, help='每种方式的运行时间（秒）')
+    parser.add_argument('--writers', type=int, default=4, help='写入线程数')
+    parser.add_argument('--readers', type=int, default=4, help='读取线程数')
+    parser.add_argument('--seed-rows', type=int, default=20000, help='预先写入的日志条数')
+    args = parser.parse_args()
+
+    print(f"{'mode':<36} {'writes/s':>10} {'reads/s':>10} {'errors':>8} {'locked':>8}")
+    for name, pooled in (('connect per call, rollback journal', False), ('pool + WAL', True)):
+        access_log = sandbox.load_module(tempfile.mkdtemp(prefix='bench-pool-'), 'utils.access_log')
+        access_log.write_batch([access_log._access_row(random.choice(PROJECT_IDS), f'10.1.0.{i % 256}')
+                                for i in range(args.seed_rows)])
+        if not pooled:
+            with access_log._connection() as conn:
+                conn.execute('PRAGMA journal_mode = DELETE')
+            access_log._pool.close()
+            access_log._connection = connect_per_call(access_log)
+
+        writes, reads, errors, locked = run(access_log, args.seconds, args.writers, args.readers)
+        print(f"{name:<36} {writes / args.seconds:>10.0f} {reads / args.seconds:>10.0f} "
+              f"{errors:>8} {locked:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置历史的基准测试（差异存储与检查点）
+
+从自带的system.conf和config.json开始，交替修改system.conf和config.json中的一个配置项，
+每次修改后保存一个版本，然后重建每个版本并与当时的文件逐字节比较：
+- copy：每个版本保存完整内容（检查点间隔为1，即差异存储之前的方式）
+- delta：只保存相对上一个版本的差异，每checkpoint-interval个修订保存一个完整检查点
+
+    python benchmarks/bench_config_history.py --revisions 1000
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+
+def stored_bytes(backup_store):
+    """对象文件和差异的总字节数"""
+    total = 0
+    for dirpath, _, filenames in os.walk(backup_store.OBJECTS_DIR):
+        total += sum(os.path.getsize(os.path.join(dirpath, filename)) for filename in filenames)
+    conn = sqlite3.connect(backup_store.DB_PATH)
+    try:
+        total += conn.execute('''
+        SELECT COALESCE(SUM(COALESCE(LENGTH(system_delta), 0) + COALESCE(LENGTH(config_delta), 0)), 0)
+        FROM versions
+        ''').fetchone()[0]
+    finally:
+        conn.close()
+    return total
+
+
+def run(revisions, checkpoint_interval):
+    root = tempfile.mkdtemp(prefix='bench-history-')
+    backup_store = sandbox.load_module(root, 'utils.backup_store')
+    ini_document = sandbox.load_module(root, 'utils.ini_document')
+
+    system_conf_path = os.path.join(root, 'system.conf')
+    config_json_path = os.path.join(root, 'config.json')
+    document = ini_document.IniDocument()
+    document.read(os.path.join(sandbox.REPO_DIR, 'system.conf'))
+    with open(os.path.join(sandbox.REPO_DIR, 'config.json'), 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    section = document.sections()[0]
+    keys = document.options(section)
+
+    expected = {}
+    save_time = 0
+    for revision in range(1, revisions + 1):
+        # 交替修改两个文件中的一个配置项
+        if revision % 2:
+            document.set(section, keys[revision % len(keys)], f'value-{revision}')
+        else:
+            config['bench'] = revision
+        with open(system_conf_path, 'w', encoding='utf-8') as f:
+            document.write(f)
+        with open(config_json_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+        with open(system_conf_path, 'rb') as f, open(config_json_path, 'rb') as g:
+            expected[revision] = (f.read(), g.read())
+
+        start = time.perf_counter()
+        backup_store.save_version('bench', revision, system_conf_path, config_json_path, checkpoint_interval)
+        save_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    for revision, contents in expected.items():
+        assert backup_store.read_version('bench', revision) == contents, revision
+    rebuild_time = time.perf_counter() - start
+
+    return save_time / revisions, rebuild_time / revisions, stored_bytes(backup_store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='配置历史的基准测试')
+    parser.add_argument('--revisions', type=int, default=1000, help='修订数量')
+    parser.add_argument('--checkpoint-interval', type=int, default=20, help='差异存储的检查点间隔')
+    args = parser.parse_args()
+
+    print(f"{args.revisions} revisions, every version rebuilt and compared byte for byte")
+    for name, interval in (('copy', 1), ('delta', args.checkpoint_interval)):
+        save, rebuild, size = run(args.revisions, interval)
+        print(f"  {name:>5} (K={interval:>2}): save {save * 1000:.2f} ms, rebuild {rebuild * 1000:.2f} ms, "
+              f"{size / 1024:.0f} KB stored")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+项目列表的基准测试（项目注册表）
+
+在临时目录中创建指定数量的项目，比较：
+- scan：每次请求遍历项目目录并解析每个project.json（注册表之前的方式）
+- registry：启动时加载一次注册表，之后每次请求读取内存快照
+
+    python benchmarks/bench_project_registry.py --projects 10000
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+
+def create_projects(projects_dir, count):
+    for i in range(count):
+        project_dir = os.path.join(projects_dir, str(uuid.uuid4()))
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, 'project.json'), 'w', encoding='utf-8') as f:
+            json.dump({'name': f'project-{i}', 'description': '', 'created_at': '2025-01-01 00:00:00',
+                       'path': os.path.join(project_dir, 'config'), 'encrypted_keys': []}, f, indent=4)
+
+
+def scan_projects(projects_dir):
+    """注册表之前api_get_projects的实现"""
+    projects = []
+    for project_id in os.listdir(projects_dir):
+        project_dir = os.path.join(projects_dir, project_id)
+        project_config_path = os.path.join(project_dir, 'project.json')
+        if os.path.isdir(project_dir) and os.path.exists(project_config_path):
+            try:
+                with open(project_config_path, 'r', encoding='utf-8') as f:
+                    project_config = json.load(f)
+                    projects.append({
+                        'id': project_id,
+                        'name': project_config.get('name', project_id),
+                        'description': project_config.get('description', ''),
+                        'created_at': project_config.get('created_at', ''),
+                        'updated_at': project_config.get('updated_at', '')
+                    })
+            except:
+                continue
+    return projects
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='项目列表的基准测试')
+    parser.add_argument('--projects', type=int, default=10000, help='项目数量')
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench-registry-')
+    project_registry = sandbox.load_module(root, 'utils.project_registry')
+    projects_dir = os.path.join(root, 'projects')
+    create_projects(projects_dir, args.projects)
+
+    scan_time, scanned = timed(lambda: scan_projects(projects_dir), 5)
+    registry = project_registry.ProjectRegistry(projects_dir)
+    load_time, _ = timed(registry.load, 1)
+    list_time, listed = timed(registry.list_projects, 10000)
+    assert len(scanned) == len(listed) == args.projects
+
+    print(f"{args.projects} projects")
+    print(f"  scan per request:       {scan_time * 1000:9.2f} ms")
+    print(f"  registry load (once):   {load_time * 1000:9.2f} ms")
+    print(f"  registry list_projects: {list_time * 1e6:9.2f} us")
+
+
+if __name__ == '__main__':
+    main()
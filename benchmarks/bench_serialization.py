@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+API响应格式的基准测试（JSON与MessagePack）
+
+用自带的system.conf和config.json创建项目，分别以JSON和MessagePack请求配置接口，
+比较响应体大小（含gzip压缩后）和客户端的解码耗时。需要安装msgpack
+
+    python benchmarks/bench_serialization.py --repeat 2000
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import tempfile
+
+import msgpack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+
+def decode_time(decode, body, repeat):
+    """平均每次解码的耗时（秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decode(body)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API响应格式的基准测试')
+    parser.add_argument('--repeat', type=int, default=2000, help='每种格式的解码次数')
+    args = parser.parse_args()
+
+    app_module = sandbox.load_app(tempfile.mkdtemp(prefix='bench-serialization-'))
+    client = app_module.app.test_client()
+    project_id = sandbox.create_project(client, 'bench')
+
+    formats = (
+        ('application/json', lambda body: json.loads(body)),
+        ('application/msgpack', lambda body: msgpack.unpackb(body, raw=False)),
+    )
+    urls = (
+        ('config', f'/api/projects/{project_id}/config'),
+        ('config value', f'/api/projects/{project_id}/config/system.key.gpt_api_key'),
+    )
+
+    print(f"{'endpoint':<14} {'format':<22} {'bytes':>8} {'gzip bytes':>11} {'decode':>11}")
+    for name, url in urls:
+        for mimetype, decode in formats:
+            response = client.get(url, headers={**sandbox.API_HEADERS, 'Accept': mimetype})
+            assert response.mimetype == mimetype, response.mimetype
+            body = response.data
+            elapsed = decode_time(decode, body, args.repeat)
+            print(f"{name:<14} {mimetype:<22} {len(body):>8,} {len(gzip.compress(body)):>11,} "
+                  f"{elapsed * 1e6:>8.1f} µs")
+
+
+if __name__ == '__main__':
+    main()
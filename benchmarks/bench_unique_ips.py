@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+访问日志写入的基准测试（增量维护唯一IP数）
+
+日志表逐步增长到每个规模后，测量log_access的平均耗时，并单独测量
+之前每次写入都要执行的COUNT(DISTINCT ip_address)查询作为对比。
+为了快速构造大表，历史日志直接批量插入access_logs和project_ips，不经过log_access
+
+    python benchmarks/bench_unique_ips.py --sizes 10000 100000 1000000 10000000
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+PROJECT_ID = 'bench'
+
+
+def random_ip(rows):
+    # 大约十分之一的日志来自不同的IP
+    i = random.randrange(max(1, rows // 10))
+    return f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'
+
+
+def grow(access_log, current, size):
+    """批量插入历史日志，使项目的日志数达到size"""
+    conn = sqlite3.connect(access_log.DB_PATH)
+    try:
+        while current < size:
+            count = min(100000, size - current)
+            rows = [access_log._access_row(PROJECT_ID, random_ip(size), endpoint='/api/projects/bench/config')
+                    for _ in range(count)]
+            conn.executemany('''
+            INSERT INTO access_logs (
+                project_id, access_time, ip_address, user_agent, request_method,
+                endpoint, params, status_code, response_time, user_id
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.executemany('INSERT OR IGNORE INTO project_ips (project_id, ip_address) VALUES (?, ?)',
+                             {(PROJECT_ID, row[2]) for row in rows})
+            conn.commit()
+            current += count
+    finally:
+        conn.close()
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='访问日志写入的基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='日志表的规模')
+    parser.add_argument('--calls', type=int, default=200, help='每个规模下log_access的调用次数')
+    args = parser.parse_args()
+
+    access_log = sandbox.load_module(tempfile.mkdtemp(prefix='bench-unique-ips-'), 'utils.access_log')
+    conn = sqlite3.connect(access_log.DB_PATH)
+
+    print(f"{'rows':>12} {'log_access':>12} {'COUNT(DISTINCT) alone':>24}")
+    current = 0
+    for size in sorted(args.sizes):
+        current = grow(access_log, current, size)
+
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            access_log.log_access(PROJECT_ID, random_ip(size), endpoint='/api/projects/bench/config')
+        log_time = (time.perf_counter() - start) / args.calls
+        current += args.calls
+
+        start = time.perf_counter()
+        conn.execute('SELECT COUNT(DISTINCT ip_address) FROM access_logs WHERE project_id = ?',
+                     (PROJECT_ID,)).fetchone()
+        distinct_time = time.perf_counter() - start
+
+        print(f"{size:>12,} {log_time * 1000:>9.2f} ms {distinct_time * 1000:>21.1f} ms")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
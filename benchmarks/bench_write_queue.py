@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置写入的并发基准测试（写入队列）
+
+多个线程通过PUT接口并发修改同一项目的不同配置项，统计吞吐量和丢失的修改数量：
+- unserialized：每个请求各自读取、修改、写入文件（写入队列之前的方式）
+- queue：修改进入按项目合并的写入队列
+
+    python benchmarks/bench_write_queue.py --threads 16 --edits 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+
+def run(module, threads, edits, serialized):
+    client = module.app.test_client()
+    project_id = sandbox.create_project(client, 'bench')
+
+    if not serialized:
+        # 绕过写入队列，每个修改单独执行一次读取-修改-写入，不加锁
+        def submit(project_id, edit):
+            result = module.commit_project_edits(project_id, [edit])[0]
+            if isinstance(result, Exception):
+                raise result
+            return result
+        original_submit = module.project_writer.submit
+        module.project_writer.submit = submit
+    batches = module.project_writer.stats['batches']
+
+    failed = []
+
+    def write(thread):
+        writer = module.app.test_client()
+        for i in range(edits // threads):
+            response = writer.put(f'/api/projects/{project_id}/config/config.bench.k{thread}_{i}',
+                                  json={'value': i}, headers=sandbox.API_HEADERS)
+            if response.status_code != 200:
+                failed.append(response.status_code)
+
+    workers = [threading.Thread(target=write, args=(thread,)) for thread in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    if not serialized:
+        module.project_writer.submit = original_submit
+
+    config = client.get(f'/api/projects/{project_id}/config', headers=sandbox.API_HEADERS).get_json()
+    written = len(config['project']['config_json'].get('bench', {}))
+    total = threads * (edits // threads)
+    return {
+        'total': total,
+        'writes_per_second': total / elapsed,
+        'failed': len(failed),
+        'lost': total - written - len(failed),
+        'batches': module.project_writer.stats['batches'] - batches if serialized else total
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='配置写入的并发基准测试')
+    parser.add_argument('--threads', type=int, default=16, help='并发线程数')
+    parser.add_argument('--edits', type=int, default=256, help='修改总数（按线程数取整），每个修改写入不同的配置项')
+    args = parser.parse_args()
+
+    module = sandbox.load_app(tempfile.mkdtemp(prefix='bench-write-queue-'))
+    for name, serialized in (('unserialized', False), ('queue', True)):
+        result = run(module, args.threads, args.edits, serialized)
+        print(f"{name:>12}: {result['writes_per_second']:7.1f} writes/s, "
+              f"{result['lost']} of {result['total']} lost, {result['failed']} failed, {result['batches']} batches")
+
+
+if __name__ == '__main__':
+    main()
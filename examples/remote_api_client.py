@@ -14,6 +14,12 @@ import argparse
 import requests
 from pprint import pprint
 
+try:
+    # 可选依赖，安装后优先使用MessagePack格式传输
+    import msgpack
+except ImportError:
+    msgpack = None
+
 class RemoteConfigClient:
     """远程配置客户端类，用于通过API接口访问配置服务器"""
     
@@ -29,9 +35,16 @@ class RemoteConfigClient:
         self.api_key = api_key
         self.headers = {
             'X-API-Key': api_key,
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            'Accept': 'application/msgpack, application/json;q=0.9' if msgpack else 'application/json'
         }
     
+    def _decode(self, response):
+        """根据响应的Content-Type解码，支持JSON和MessagePack"""
+        if msgpack and response.headers.get('Content-Type', '').startswith('application/msgpack'):
+            return msgpack.unpackb(response.content, raw=False)
+        return response.json()
+    
     def get_projects(self):
         """
         获取所有可用的项目列表
@@ -46,7 +59,7 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return []
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return []
@@ -70,7 +83,7 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return None
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return None
@@ -95,13 +108,38 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return None
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return None
         
         return data.get('config_value')
     
+    def get_config_values(self, project_id, config_paths):
+        """
+        批量获取指定项目的多个配置项
+        
+        Args:
+            project_id: 项目ID
+            config_paths: 配置路径列表
+        
+        Returns:
+            {配置路径: 值} 字典，找不到的配置项不包含在内
+        """
+        url = f"{self.api_url}/api/projects/{project_id}/config/values"
+        response = requests.post(url, headers=self.headers, json={'keys': config_paths})
+        
+        if response.status_code != 200:
+            print(f"Error: {response.status_code} - {response.text}")
+            return None
+        
+        data = self._decode(response)
+        if not data.get('success', False):
+            print(f"API错误: {data.get('message', '未知错误')}")
+            return None
+        
+        return data.get('values')
+    
     def update_config_value(self, project_id, config_path, value):
         """
         更新指定项目的特定配置项的值
@@ -125,14 +163,14 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return False
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return False
         
         return True
     
-    def get_project_logs(self, project_id, limit=100, offset=0):
+    def get_project_logs(self, project_id, limit=100, offset=0, before_id=None):
         """
         获取项目的访问日志
         
@@ -140,6 +178,7 @@ class RemoteConfigClient:
             project_id: 项目ID
             limit: 返回记录数量限制
             offset: 分页偏移量
+            before_id: 翻页游标，取上一页返回的next_before
             
         Returns:
             访问日志数据
@@ -149,6 +188,8 @@ class RemoteConfigClient:
             'limit': limit,
             'offset': offset
         }
+        if before_id is not None:
+            params['before_id'] = before_id
         
         response = requests.get(url, headers=self.headers, params=params)
         
@@ -156,7 +197,7 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return None
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return None
@@ -181,7 +222,7 @@ class RemoteConfigClient:
             print(f"Error: {response.status_code} - {response.text}")
             return None
         
-        data = response.json()
+        data = self._decode(response)
         if not data.get('success', False):
             print(f"API错误: {data.get('message', '未知错误')}")
             return None
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+使用gevent运行配置服务
+
+watch接口的每个SSE连接在等待配置变更时都会一直占用处理它的单元：Flask开发服务器和
+线程模式的WSGI服务器为每个连接占用一个操作系统线程。这里在导入应用之前对标准库打猴子补丁，
+threading的锁和条件变量、time.sleep、queue和socket都变为协作式的，每个连接只占用一个greenlet，
+数千个空闲的订阅者也只需要少量操作系统线程。
+
+配置变更通知保存在进程内存中，只能以单进程运行：使用gunicorn时需要`-k gevent -w 1`
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import os
+import argparse
+
+from gevent.pywsgi import WSGIServer
+
+from app import app
+
+
+def main():
+    parser = argparse.ArgumentParser(description='使用gevent运行配置服务')
+    parser.add_argument('--host', default=os.environ.get('HOST', '0.0.0.0'), help='监听地址')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5500)), help='监听端口')
+    args = parser.parse_args()
+
+    server = WSGIServer((args.host, args.port), app)
+    print(f"配置服务已启动（gevent）: http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
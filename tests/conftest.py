@@ -0,0 +1,21 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from tests import sandbox
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    return sandbox.load_app(str(tmp_path_factory.mktemp('app')))
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def project_id(client):
+    return sandbox.create_project(client)
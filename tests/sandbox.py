@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试和基准测试使用的隔离环境
+
+把app.py及其依赖复制到临时目录后再导入，项目目录、修订历史、配置备份和访问日志
+都位于临时目录中，不会修改仓库中的data和projects
+"""
+
+import os
+import re
+import sys
+import shutil
+import importlib
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+API_KEY = 'your-api-key-here'
+
+API_HEADERS = {'X-API-Key': API_KEY}
+
+_FILES = ('app.py', 'system.conf', 'config.json')
+_DIRS = ('utils', 'templates')
+
+
+def _copy_tree(root, names):
+    for name in names:
+        target = os.path.join(root, name)
+        if os.path.exists(target):
+            continue
+        source = os.path.join(REPO_DIR, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, target, ignore=shutil.ignore_patterns('__pycache__'))
+        else:
+            shutil.copy2(source, target)
+    os.makedirs(os.path.join(root, 'data'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'projects'), exist_ok=True)
+
+    # 同一进程中只能导入一个应用副本
+    for name in list(sys.modules):
+        if name in ('app', 'utils') or name.startswith('utils.'):
+            del sys.modules[name]
+    sys.path.insert(0, root)
+
+
+def load_module(root, name):
+    """
+    在root目录中创建utils的副本并导入其中的模块，数据库文件位于root/data下
+
+    Args:
+        root: 临时目录
+        name: 模块名，如utils.access_log
+
+    Returns:
+        导入的模块
+    """
+    _copy_tree(root, _DIRS)
+    return importlib.import_module(name)
+
+
+def load_app(root):
+    """
+    在root目录中创建应用副本并导入
+
+    Args:
+        root: 临时目录
+
+    Returns:
+        导入的app模块
+    """
+    _copy_tree(root, _FILES + _DIRS)
+    module = importlib.import_module('app')
+    module.app.config['TESTING'] = True
+    return module
+
+
+def login(client):
+    """以默认管理员账号登录Web界面"""
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+
+
+def create_project(client, name='test'):
+    """
+    通过Web界面创建项目，配置文件复制自应用目录中的system.conf和config.json
+
+    Returns:
+        项目ID
+    """
+    login(client)
+    response = client.post('/project/new', data={'project_name': name})
+    match = re.search(r'/project/([^/]+)/config', response.headers['Location'])
+    return match.group(1)
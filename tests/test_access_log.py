@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""访问日志的游标翻页和后台写入器的计数"""
+
+import threading
+
+from tests import sandbox
+
+
+def write_logs(access_log, project_id, count):
+    access_log.write_batch([
+        access_log._access_row(project_id, f'10.0.0.{i}', endpoint=f'/api/projects/{project_id}/config')
+        for i in range(count)
+    ])
+
+
+def get_logs(client, project_id, **params):
+    return client.get(f'/api/projects/{project_id}/logs', query_string=params, headers=sandbox.API_HEADERS)
+
+
+def test_cursor_pages_through_all_logs(app_module, client, project_id):
+    write_logs(app_module.access_log, project_id, 5)
+    seen = []
+    params = {'limit': 2}
+    while True:
+        logs = get_logs(client, project_id, **params).get_json()['logs']
+        seen.extend(log['id'] for log in logs['logs'])
+        if logs['next_before'] is None:
+            break
+        params['before_id'] = logs['next_before']
+    assert len(seen) == len(set(seen)) >= 5
+
+
+def test_cursor_pages_back_toward_newer_logs(app_module):
+    access_log = app_module.access_log
+    write_logs(access_log, 'paging', 7)
+
+    # 向更早翻到最后一页
+    pages = [access_log.get_project_access_logs('paging', limit=3)]
+    assert pages[0]['next_after'] is None
+    while pages[-1]['next_before'] is not None:
+        pages.append(access_log.get_project_access_logs('paging', limit=3, before_id=pages[-1]['next_before']))
+    assert [len(page['logs']) for page in pages] == [3, 3, 1]
+
+    # 再从最后一页向更新翻回，每一页都与之前看到的相同
+    page = pages[-1]
+    for expected in reversed(pages[:-1]):
+        assert page['next_after'] is not None
+        page = access_log.get_project_access_logs('paging', limit=3, after_id=page['next_after'])
+        assert [log['id'] for log in page['logs']] == [log['id'] for log in expected['logs']]
+        assert page['next_before'] is not None
+    assert page['next_after'] is None
+
+
+def test_api_returns_next_after(app_module, client, project_id):
+    write_logs(app_module.access_log, project_id, 5)
+    first = get_logs(client, project_id, limit=2).get_json()['logs']
+    second = get_logs(client, project_id, limit=2, before_id=first['next_before']).get_json()['logs']
+    assert second['next_after'] == second['logs'][0]['id']
+    back = get_logs(client, project_id, limit=2, after_id=second['next_after']).get_json()['logs']
+    assert [log['id'] for log in back['logs']] == [log['id'] for log in first['logs']]
+
+    response = client.get(f'/project/{project_id}/logs', query_string={'per_page': 2, 'before_id': first['next_before']})
+    assert response.status_code == 200
+    assert f'after_id={second["next_after"]}' in response.get_data(as_text=True)
+
+
+def test_invalid_cursor_is_rejected(app_module, client, project_id):
+    write_logs(app_module.access_log, project_id, 1)
+    other_project_id = sandbox.create_project(client, 'other')
+    write_logs(app_module.access_log, other_project_id, 1)
+    foreign_id = get_logs(client, other_project_id).get_json()['logs']['logs'][0]['id']
+
+    for name in ('before_id', 'after_id'):
+        for cursor in (999999999, foreign_id, 'abc'):
+            response = get_logs(client, project_id, **{name: cursor})
+            assert response.status_code == 400
+            assert response.get_json()['success'] is False
+
+            response = client.get(f'/project/{project_id}/logs', query_string={name: cursor})
+            assert response.status_code == 400
+
+    own_id = get_logs(client, project_id).get_json()['logs']['logs'][0]['id']
+    assert get_logs(client, project_id, before_id=own_id, after_id=own_id).status_code == 400
+
+
+def test_writer_counts_every_submission(app_module):
+    access_log = app_module.access_log
+    # 不启动后台线程，队列写满后其余的日志全部被丢弃
+    writer = access_log.AccessLogWriter(max_queue=500)
+    row = access_log._access_row('counting', '10.0.0.1')
+
+    def submit():
+        for _ in range(2000):
+            writer.submit(row)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = writer.get_stats()
+    assert stats['queued'] == 500
+    assert stats['dropped'] == 8 * 2000 - 500
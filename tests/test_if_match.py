@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""If-Match既可以是修订号，也可以是GET接口返回的ETag"""
+
+from tests import sandbox
+
+PATH = 'system.key.gpt_api_key'
+OTHER_PATH = 'system.key.gpt_base_url'
+
+
+def put_value(client, project_id, path, value, if_match):
+    return client.put(f'/api/projects/{project_id}/config/{path}', json={'value': value},
+                      headers={**sandbox.API_HEADERS, 'If-Match': if_match})
+
+
+def config_etag(client, project_id, **headers):
+    response = client.get(f'/api/projects/{project_id}/config', headers={**sandbox.API_HEADERS, **headers})
+    assert response.status_code == 200
+    return response.headers['ETag']
+
+
+def test_config_etag_is_accepted(client, project_id):
+    etag = config_etag(client, project_id)
+    response = put_value(client, project_id, PATH, 'a', etag)
+    assert response.status_code == 200
+
+    # 配置已被修改，旧的ETag不再匹配
+    response = put_value(client, project_id, OTHER_PATH, 'b', etag)
+    assert response.status_code == 412
+    assert response.get_json()['revision'] == 1
+
+    response = put_value(client, project_id, OTHER_PATH, 'b', config_etag(client, project_id))
+    assert response.status_code == 200
+
+
+def test_encoded_config_etag_is_accepted(client, project_id):
+    etag = config_etag(client, project_id, **{'Accept-Encoding': 'gzip'})
+    assert etag.endswith('-gzip"')
+    assert put_value(client, project_id, PATH, 'a', etag).status_code == 200
+
+
+def test_config_value_etag_is_accepted(client, project_id):
+    response = client.get(f'/api/projects/{project_id}/config/{PATH}', headers=sandbox.API_HEADERS)
+    etag = response.headers['ETag']
+    assert put_value(client, project_id, PATH, 'a', etag).status_code == 200
+    assert put_value(client, project_id, PATH, 'b', etag).status_code == 412
+
+
+def test_revision_is_still_accepted(client, project_id):
+    assert put_value(client, project_id, PATH, 'a', '0').status_code == 200
+    assert put_value(client, project_id, PATH, 'b', '"0"').status_code == 412
+    assert put_value(client, project_id, OTHER_PATH, 'c', '0').status_code == 200
+    assert put_value(client, project_id, OTHER_PATH, 'd', '*').status_code == 200
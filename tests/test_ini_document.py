@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""IniDocument与ConfigParser的读取结果一致，修改单个配置项只改变该项所在的行"""
+
+import os
+import difflib
+import configparser
+
+import pytest
+
+from tests import sandbox
+from utils.ini_document import IniDocument, IniParseError
+
+BUNDLED = os.path.join(sandbox.REPO_DIR, 'system.conf')
+
+SAMPLE = """# 文件开头的注释
+
+[first]
+; 分号注释
+Key = value
+multi = line one
+    line two
+
+    line three
+# 注释
+
+[second]
+empty =
+colon: value
+spaced   =   padded value  
+"""
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def parse_both(text):
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read_string(text)
+    document = IniDocument()
+    document.read_string(text)
+    return parser, document
+
+
+def assert_same(parser, document):
+    assert document.sections() == parser.sections()
+    for section in parser.sections():
+        assert document.items(section) == list(parser.items(section))
+
+
+@pytest.fixture(params=['bundled', 'sample'])
+def text(request):
+    return read_text(BUNDLED) if request.param == 'bundled' else SAMPLE
+
+
+def test_read_matches_configparser(text):
+    assert_same(*parse_both(text))
+
+
+def test_round_trip_is_byte_exact(text):
+    document = IniDocument()
+    document.read_string(text)
+    assert document.to_string() == text
+
+
+def test_set_replaces_only_one_line():
+    text = read_text(BUNDLED)
+    parser, document = parse_both(text)
+    section = parser.sections()[0]
+    key = parser.options(section)[0]
+
+    document.set(section, key, 'changed')
+    parser.set(section, key, 'changed')
+
+    changed = [line for line in difflib.ndiff(text.splitlines(), document.to_string().splitlines())
+               if line[:1] in '+-']
+    assert len(changed) == 2
+    reparsed, _ = parse_both(document.to_string())
+    assert_same(reparsed, document)
+    assert_same(parser, document)
+
+
+def test_edits_match_configparser(text):
+    parser, document = parse_both(text)
+    first, section = parser.sections()[0], parser.sections()[-1]
+    key = parser.options(section)[0]
+
+    for target in (parser, document):
+        target.remove_option(section, key)
+        target.set(section, 'added_key', 'added value')
+        target.set(section, 'multiline', 'a\nb')
+        target.add_section('new_section')
+        target.set('new_section', 'x', '1')
+        target.remove_section(first)
+    assert_same(parser, document)
+
+    reparsed, _ = parse_both(document.to_string())
+    assert_same(reparsed, document)
+
+
+@pytest.mark.parametrize('text', [
+    '[a]\nx = 1\nx = 2\n',
+    '[a]\nX = 1\nx = 2\n',
+    '[a]\nx = 1\n[b]\n[a]\ny = 2\n',
+    'x = 1\n',
+    '[a]\n= 1\n'
+])
+def test_invalid_documents_are_rejected(text):
+    with pytest.raises(configparser.Error):
+        configparser.ConfigParser(interpolation=None).read_string(text)
+    with pytest.raises(IniParseError):
+        IniDocument().read_string(text)
+
+
+def test_remove_option_removes_the_key():
+    document = IniDocument()
+    document.read_string('[a]\nx = 1\ny = 2\n')
+    assert document.remove_option('a', 'X')
+    assert not document.has_option('a', 'x')
+    assert document.to_string() == '[a]\ny = 2\n'
+    assert not document.remove_option('a', 'x')
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""配置页面的修改不与页面自己之前的修改冲突，但仍与他人的修改冲突"""
+
+import json
+
+from tests import sandbox
+
+
+def edit_field(client, project_id, value, revision, written):
+    return client.post(f'/project/{project_id}/config', data={
+        'field_management': '1', 'action': 'add_update', 'type': 'config',
+        'path': 'attribute', 'key': 'name', 'value': value,
+        'revision': revision, 'written': json.dumps(written)
+    }, headers={'X-Requested-With': 'XMLHttpRequest'})
+
+
+def put_value(client, project_id, path, value):
+    response = client.put(f'/api/projects/{project_id}/config/{path}', json={'value': value},
+                          headers=sandbox.API_HEADERS)
+    assert response.status_code == 200
+    return response.get_json()['revision']
+
+
+def track(written, data):
+    """与页面中的trackRevision相同：记录本次写入的路径"""
+    for path in data['paths']:
+        written[path] = data['revision']
+
+
+def test_page_edits_after_unrelated_write(client, project_id):
+    written = {}
+    put_value(client, project_id, 'system.key.gpt_base_url', 'http://example.com')
+
+    response = edit_field(client, project_id, 'a', 0, written)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['revision'] == 2
+    assert data['paths'] == ['config.attribute.name']
+    track(written, data)
+
+    # 页面加载时的修订号仍为0，但config.attribute.name是页面自己在修订2写入的
+    response = edit_field(client, project_id, 'b', 0, written)
+    assert response.status_code == 200
+    assert response.get_json()['revision'] == 3
+
+
+def test_page_edit_conflicts_with_later_write(client, project_id):
+    written = {}
+    track(written, edit_field(client, project_id, 'a', 0, written).get_json())
+    put_value(client, project_id, 'config.attribute.name', 'other')
+
+    response = edit_field(client, project_id, 'b', 0, written)
+    assert response.status_code == 412
+    assert response.get_json()['conflicts'] == ['config.attribute.name']
+
+
+def test_written_does_not_cover_other_paths(client, project_id):
+    written = {}
+    track(written, edit_field(client, project_id, 'a', 0, written).get_json())
+    put_value(client, project_id, 'config.attribute.age', 'other')
+
+    response = client.post(f'/project/{project_id}/config', data={
+        'field_management': '1', 'action': 'add_update', 'type': 'config',
+        'path': 'attribute', 'key': 'age', 'value': 'mine',
+        'revision': 0, 'written': json.dumps(written)
+    }, headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert response.status_code == 412
+
+
+def test_invalid_written_is_rejected(client, project_id):
+    response = edit_field(client, project_id, 'a', 0, ['config'])
+    assert response.status_code == 400
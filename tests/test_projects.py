@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""项目列表响应按注册表版本缓存，注册表变化后不返回过期的列表"""
+
+from tests import sandbox
+
+
+def list_ids(client):
+    response = client.get('/api/projects', headers=sandbox.API_HEADERS)
+    assert response.status_code == 200
+    return {project['id'] for project in response.get_json()['projects']}, response.headers['ETag']
+
+
+def test_list_is_cached_until_registry_changes(app_module, client):
+    ids, etag = list_ids(client)
+    assert list_ids(client) == (ids, etag)
+    assert app_module._projects_response[0] == app_module.project_registry.version
+
+    project_id = sandbox.create_project(client, 'listed')
+    new_ids, new_etag = list_ids(client)
+    assert new_ids == ids | {project_id}
+    assert new_etag != etag
+
+
+def test_stale_version_is_re_encoded(app_module, client, monkeypatch):
+    ids, etag = list_ids(client)
+    # 缓存的版本号偏旧时重新序列化，而不是返回缓存的响应体
+    monkeypatch.setattr(app_module, '_projects_response', (-1, b'{}', 'stale', {}))
+    assert list_ids(client) == (ids, etag)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""GET请求只读取文件，不创建目录、不复制文件也不改写project.json"""
+
+import os
+import json
+import uuid
+import shutil
+import builtins
+import threading
+
+import pytest
+
+from tests import sandbox
+
+_WRITE_FUNCTIONS = [
+    (os, 'makedirs'), (os, 'mkdir'), (os, 'replace'), (os, 'rename'),
+    (os, 'remove'), (os, 'unlink'), (os, 'fsync'),
+    (shutil, 'copy'), (shutil, 'copy2'), (shutil, 'copyfile'), (shutil, 'move'), (shutil, 'rmtree')
+]
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """记录当前线程中的文件写入（后台线程的写入不计入）"""
+    calls = []
+    thread = threading.get_ident()
+
+    def record(name, original):
+        def wrapper(*args, **kwargs):
+            if threading.get_ident() == thread:
+                calls.append((name, args))
+            return original(*args, **kwargs)
+        return wrapper
+
+    original_open = builtins.open
+
+    def open_wrapper(file, mode='r', *args, **kwargs):
+        if threading.get_ident() == thread and any(flag in mode for flag in 'wax+'):
+            calls.append(('open', (file, mode)))
+        return original_open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', open_wrapper)
+    for module, name in _WRITE_FUNCTIONS:
+        monkeypatch.setattr(module, name, record(name, getattr(module, name)))
+    return calls
+
+
+@pytest.fixture
+def legacy_project_id(app_module):
+    """配置文件仍位于project.json中path目录的旧版项目（启动之后创建，未经迁移）"""
+    project_id = str(uuid.uuid4())
+    project_dir = os.path.join(app_module.APP_CONFIG['PROJECTS_DIR'], project_id)
+    legacy_dir = os.path.join(os.path.dirname(app_module.APP_CONFIG['PROJECTS_DIR']), 'legacy', project_id)
+    os.makedirs(project_dir)
+    os.makedirs(legacy_dir)
+    app_dir = os.path.dirname(app_module.__file__)
+    for filename in ('system.conf', 'config.json'):
+        shutil.copy2(os.path.join(app_dir, filename), os.path.join(legacy_dir, filename))
+    with open(os.path.join(project_dir, 'project.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'legacy', 'path': legacy_dir, 'encrypted_keys': []}, f, indent=4)
+    return project_id
+
+
+def test_get_performs_no_writes(app_module, client, legacy_project_id, writes):
+    project_dir = os.path.join(app_module.APP_CONFIG['PROJECTS_DIR'], legacy_project_id)
+    with open(os.path.join(project_dir, 'project.json'), 'rb') as f:
+        project_json = f.read()
+    sandbox.login(client)
+    writes.clear()
+
+    for _ in range(2):
+        response = client.get(f'/api/projects/{legacy_project_id}/config', headers=sandbox.API_HEADERS)
+        assert response.status_code == 200
+        assert response.get_json()['project']['system_config']
+        response = client.get(f'/api/projects/{legacy_project_id}/config/system.key.gpt_api_key',
+                              headers=sandbox.API_HEADERS)
+        assert response.status_code == 200
+        response = client.get(f'/project/{legacy_project_id}/config')
+        assert response.status_code == 200
+
+    assert writes == []
+    assert not os.path.exists(os.path.join(project_dir, 'config'))
+    with open(os.path.join(project_dir, 'project.json'), 'rb') as f:
+        assert f.read() == project_json
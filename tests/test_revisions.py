@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""每次修改配置内容都提交一个修订，并发的读取不能让写入被当作没有变化"""
+
+import threading
+
+from tests import sandbox
+
+PATH = 'system.key.gpt_api_key'
+
+
+def put_value(client, project_id, value, headers=None):
+    return client.put(f'/api/projects/{project_id}/config/{PATH}', json={'value': value},
+                      headers={**sandbox.API_HEADERS, **(headers or {})})
+
+
+def get_config(client, project_id, **params):
+    return client.get(f'/api/projects/{project_id}/config', query_string=params, headers=sandbox.API_HEADERS)
+
+
+def test_read_between_file_write_and_commit(app_module, client, project_id, monkeypatch):
+    base = get_config(client, project_id).get_json()['revision']
+    write_file_durably = app_module.write_file_durably
+
+    def write_then_read(path, write):
+        # 文件已写入、修订尚未提交时有读取请求重新加载了配置
+        write_file_durably(path, write)
+        app_module.load_project_snapshot(project_id)
+
+    monkeypatch.setattr(app_module, 'write_file_durably', write_then_read)
+    response = put_value(client, project_id, 'racing')
+    assert response.status_code == 200
+    revision = response.get_json()['revision']
+    assert revision == base + 1
+
+    delta = get_config(client, project_id, since=base).get_json()
+    assert delta['changed'] == {PATH: 'racing'}
+    events, missed = app_module.change_notifier.wait(project_id, base, timeout=0)
+    assert [event['changed_keys'] for event in events] == [[PATH]]
+    assert revision in [version['revision'] for version in app_module.backup_store.list_versions(project_id)]
+
+    snapshot = get_config(client, project_id).get_json()
+    assert snapshot['revision'] == revision
+    assert snapshot['project']['system_config']['key']['gpt_api_key'] == 'racing'
+
+
+def test_every_write_gets_a_revision_under_concurrent_reads(app_module, project_id):
+    stop = threading.Event()
+    errors = []
+
+    def poll():
+        client = app_module.app.test_client()
+        while not stop.is_set():
+            response = get_config(client, project_id)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    pollers = [threading.Thread(target=poll) for _ in range(4)]
+    for poller in pollers:
+        poller.start()
+    try:
+        client = app_module.app.test_client()
+        base = get_config(client, project_id).get_json()['revision']
+        revisions = [put_value(client, project_id, f'value-{i}').get_json()['revision'] for i in range(100)]
+    finally:
+        stop.set()
+        for poller in pollers:
+            poller.join()
+
+    assert errors == []
+    assert revisions == list(range(base + 1, base + 101))
+    assert len(get_config(client, project_id, since=base).get_json()['changed']) == 1
+
+
+def test_unchanged_value_does_not_create_revision(client, project_id):
+    revision = put_value(client, project_id, 'same').get_json()['revision']
+    assert put_value(client, project_id, 'same').get_json()['revision'] == revision
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Accept: application/msgpack时API返回MessagePack格式"""
+
+import types
+
+import pytest
+
+from tests import sandbox
+
+msgpack = pytest.importorskip('msgpack')
+
+MSGPACK_HEADERS = {**sandbox.API_HEADERS, 'Accept': 'application/msgpack'}
+
+
+def test_config_msgpack_response(client, project_id):
+    url = f'/api/projects/{project_id}/config'
+    json_response = client.get(url, headers=sandbox.API_HEADERS)
+    response = client.get(url, headers=MSGPACK_HEADERS)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    assert 'Accept' in response.headers['Vary']
+    assert msgpack.unpackb(response.data, raw=False) == json_response.get_json()
+
+    # MessagePack响应使用带-msgpack后缀的ETag，与JSON响应区分
+    etag = response.headers['ETag']
+    assert etag == json_response.headers['ETag'][:-1] + '-msgpack"'
+    response = client.get(url, headers={**MSGPACK_HEADERS, 'If-None-Match': etag})
+    assert response.status_code == 304
+    response = client.get(url, headers={**sandbox.API_HEADERS, 'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+def test_config_value_msgpack_response(client, project_id):
+    url = f'/api/projects/{project_id}/config/system.key.gpt_api_key'
+    response = client.get(url, headers=MSGPACK_HEADERS)
+    assert response.mimetype == 'application/msgpack'
+    assert response.headers['ETag'].endswith('-msgpack"')
+    assert msgpack.unpackb(response.data, raw=False) == client.get(url, headers=sandbox.API_HEADERS).get_json()
+
+
+def test_json_is_default(client, project_id):
+    response = client.get(f'/api/projects/{project_id}/config', headers=sandbox.API_HEADERS)
+    assert response.mimetype == 'application/json'
+    assert not response.headers['ETag'].endswith('-msgpack"')
+
+
+def test_client_decodes_msgpack(app_module, client, project_id):
+    config_util = app_module.config_util
+    assert config_util._api_accept_header().startswith('application/msgpack')
+
+    response = client.get(f'/api/projects/{project_id}/config',
+                          headers={**sandbox.API_HEADERS, 'Accept': config_util._api_accept_header()})
+    decoded = config_util._decode_api_response(
+        types.SimpleNamespace(headers=response.headers, content=response.data))
+    assert decoded['success']
+    assert decoded['project']['id'] == project_id
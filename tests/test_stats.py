@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""统计范围的时间参数按服务器本地时间解释，带时区偏移的时间先换算"""
+
+import datetime
+
+from tests import sandbox
+
+
+def test_naive_time_is_local(app_module):
+    assert app_module.parse_stats_time('2024-01-01 08:00:00') == datetime.datetime(2024, 1, 1, 8)
+    assert app_module.parse_stats_time('2024-01-01') == datetime.datetime(2024, 1, 1)
+    assert app_module.parse_stats_time('') is None
+
+
+def test_offset_is_converted(app_module):
+    utc = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    expected = utc.astimezone().replace(tzinfo=None)
+    # 同一时刻的不同写法换算为同一个本地时间
+    assert app_module.parse_stats_time('2024-01-01T00:00:00+00:00') == expected
+    assert app_module.parse_stats_time('2024-01-01T08:00:00+08:00') == expected
+    assert app_module.parse_stats_time('2023-12-31T19:00:00-05:00') == expected
+
+
+def test_stats_range_with_offset(app_module, client, project_id):
+    app_module.access_log.write_batch([app_module.access_log._access_row(project_id, '10.0.0.1')])
+    now = datetime.datetime.now().astimezone()
+    response = client.get(f'/api/projects/{project_id}/stats', headers=sandbox.API_HEADERS, query_string={
+        'bucket': 'hour',
+        'from': (now - datetime.timedelta(hours=2)).astimezone(datetime.timezone(datetime.timedelta(hours=8))).isoformat(),
+        'to': now.astimezone(datetime.timezone.utc).isoformat()
+    })
+    assert response.status_code == 200
+    assert response.get_json()['rollups']['summary']['total'] >= 1
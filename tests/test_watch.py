@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""watch接口推送配置变更，以及变更事件扇出到大量订阅者的延迟"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+
+import pytest
+
+from tests import sandbox
+
+PATH = 'system.key.gpt_api_key'
+
+
+def read_event(stream, event_type):
+    data = b''
+    while f'event: {event_type}'.encode() not in data:
+        data += next(stream)
+    return data.decode()
+
+
+def test_watch_streams_change_event(client, project_id):
+    response = client.get(f'/api/projects/{project_id}/watch', headers=sandbox.API_HEADERS, buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    stream = iter(response.response)
+    read_event(stream, 'hello')
+
+    revision = client.put(f'/api/projects/{project_id}/config/{PATH}', json={'value': 'watched'},
+                          headers=sandbox.API_HEADERS).get_json()['revision']
+    event = read_event(stream, 'change')
+    response.close()
+
+    data = json.loads(event.split('data: ', 1)[1].splitlines()[0])
+    assert data['id'] == revision
+    assert data['changed_keys'] == [PATH]
+
+
+def test_notifier_fan_out_latency(app_module):
+    notifier = app_module.change_notifier
+    project_id = 'fan-out'
+    subscribers = 200
+    ready = threading.Barrier(subscribers + 1)
+    received = []
+
+    def subscribe():
+        ready.wait()
+        events, _ = notifier.wait(project_id, 0, timeout=10)
+        if events:
+            received.append(time.perf_counter())
+
+    threads = [threading.Thread(target=subscribe) for _ in range(subscribers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    time.sleep(0.1)
+    start = time.perf_counter()
+    notifier.publish(project_id, ['config.x'], 1)
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(t - start for t in received)
+    print(f'\n{subscribers}个线程订阅者: p50={latencies[len(latencies) // 2] * 1000:.2f}ms '
+          f'max={latencies[-1] * 1000:.2f}ms')
+    assert len(latencies) == subscribers
+    assert latencies[-1] < 1
+
+
+def test_gevent_fan_out_latency():
+    pytest.importorskip('gevent')
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'watch_fanout.py')
+    output = subprocess.run([sys.executable, script, '--subscribers', '1000'],
+                            capture_output=True, text=True, timeout=120, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(f'\ngevent {result["subscribers"]}个SSE连接: 操作系统线程{result["os_threads"]}个 '
+          f'p50={result["p50"] * 1000:.2f}ms p99={result["p99"] * 1000:.2f}ms max={result["max"] * 1000:.2f}ms')
+
+    assert result['write_status'] == 200
+    assert result['connected'] == result['received'] == 1000
+    # 每个连接只占用一个greenlet，而不是一个线程
+    if result['os_threads'] is not None:
+        assert result['os_threads'] < 50
+    assert result['max'] < 5
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""并发修改同一项目的不同配置项时不丢失修改"""
+
+import threading
+
+from tests import sandbox
+
+THREADS = 8
+EDITS = 25
+
+
+def test_concurrent_edits_are_not_lost(app_module, project_id):
+    client = app_module.app.test_client()
+    base = client.get(f'/api/projects/{project_id}/config', headers=sandbox.API_HEADERS).get_json()['revision']
+    edits = app_module.project_writer.stats['edits']
+    stop = threading.Event()
+    statuses = []
+
+    def poll():
+        # 并发的读取不能影响修订的提交
+        poller = app_module.app.test_client()
+        while not stop.is_set():
+            poller.get(f'/api/projects/{project_id}/config', headers=sandbox.API_HEADERS)
+
+    def write(thread):
+        writer = app_module.app.test_client()
+        for i in range(EDITS):
+            response = writer.put(f'/api/projects/{project_id}/config/config.concurrency.k{thread}_{i}',
+                                  json={'value': i}, headers=sandbox.API_HEADERS)
+            statuses.append(response.status_code)
+
+    pollers = [threading.Thread(target=poll) for _ in range(2)]
+    writers = [threading.Thread(target=write, args=(thread,)) for thread in range(THREADS)]
+    for thread in pollers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in pollers:
+        thread.join()
+
+    assert statuses == [200] * (THREADS * EDITS)
+    expected = {f'k{thread}_{i}': i for thread in range(THREADS) for i in range(EDITS)}
+    config = client.get(f'/api/projects/{project_id}/config', headers=sandbox.API_HEADERS).get_json()
+    assert config['project']['config_json']['concurrency'] == expected
+
+    # 每个修改都记录在某个修订中
+    delta = client.get(f'/api/projects/{project_id}/config', query_string={'since': base},
+                       headers=sandbox.API_HEADERS).get_json()
+    assert set(delta['changed']) == {f'config.concurrency.{key}' for key in expected}
+    assert app_module.project_writer.stats['edits'] - edits == THREADS * EDITS
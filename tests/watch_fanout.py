@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测量watch接口的扇出延迟
+
+与serve.py相同，先打猴子补丁再导入应用，在本机端口上用gevent的WSGIServer运行隔离的应用副本。
+建立指定数量的SSE连接并全部收到hello事件后，通过API修改一个配置项，
+记录每个连接收到change事件的时间。结果以JSON输出到标准输出：
+
+    python tests/watch_fanout.py --subscribers 2000
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+
+import gevent
+from gevent.pywsgi import WSGIServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import sandbox
+
+
+def os_thread_count():
+    """进程中的操作系统线程数，无法获取时返回None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def subscribe(port, project_id, connected, received):
+    """建立一个SSE连接，收到hello后计数，收到change后记录时间"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    try:
+        sock.sendall((f'GET /api/projects/{project_id}/watch HTTP/1.1\r\n'
+                      f'Host: localhost\r\nX-API-Key: {sandbox.API_KEY}\r\n'
+                      'Accept: text/event-stream\r\n\r\n').encode())
+        data = b''
+        while b'event: hello' not in data:
+            data += sock.recv(4096)
+        connected.append(1)
+        while b'event: change' not in data:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            data += chunk
+        received.append(time.perf_counter())
+    finally:
+        sock.close()
+
+
+def measure(subscribers, timeout=60):
+    module = sandbox.load_app(tempfile.mkdtemp(prefix='watch-fanout-'))
+    client = module.app.test_client()
+    project_id = sandbox.create_project(client)
+
+    server = WSGIServer(('127.0.0.1', 0), module.app, log=None)
+    server.start()
+    port = server.server_port
+
+    connected = []
+    received = []
+    greenlets = [gevent.spawn(subscribe, port, project_id, connected, received) for _ in range(subscribers)]
+    deadline = time.monotonic() + timeout
+    while len(connected) < subscribers and time.monotonic() < deadline:
+        gevent.sleep(0.05)
+    threads = os_thread_count()
+
+    start = time.perf_counter()
+    response = client.put(f'/api/projects/{project_id}/config/system.key.gpt_api_key',
+                          json={'value': 'fan-out'}, headers=sandbox.API_HEADERS)
+    gevent.joinall(greenlets, timeout=max(1, deadline - time.monotonic()))
+    server.stop(timeout=1)
+
+    latencies = sorted(t - start for t in received)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else None
+
+    return {
+        'subscribers': subscribers,
+        'connected': len(connected),
+        'received': len(received),
+        'write_status': response.status_code,
+        'os_threads': threads,
+        'p50': percentile(0.5),
+        'p99': percentile(0.99),
+        'max': latencies[-1] if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量watch接口的扇出延迟')
+    parser.add_argument('--subscribers', type=int, default=1000, help='SSE连接数量')
+    args = parser.parse_args()
+    print(json.dumps(measure(args.subscribers)))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,23 @@
 """
 访问日志模块
 
-负责记录项目访问日志，包括访问时间、IP地址、请求类型等信息
+负责记录项目访问日志，包括访问时间、IP地址、请求类型等信息。
+请求路径上只把日志放入有界队列，由后台线程批量写入数据库，
+同时维护按分钟、小时、天汇总的访问统计，按时间范围的统计只查询汇总表。
+数据库使用WAL日志模式，读取不会被写入阻塞；连接从连接池中复用，不在每次调用时重新打开
 """
 
 import os
 import json
 import time
+import queue
+import atexit
 import datetime
 import sqlite3
+import threading
+from contextlib import contextmanager
+
+from utils import hyperloglog
 
 # 数据库文件路径
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'access_logs.db')
@@ -19,12 +28,95 @@ DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__)
 # 确保数据目录存在
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-def init_db():
-    """初始化数据库，创建访问日志表"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# 连接池中保留的空闲连接数量
+POOL_SIZE = 8
+
+# 数据库被锁定时等待的秒数
+BUSY_TIMEOUT = 5
+
+# 每个连接的页缓存（KiB）和内存映射大小（字节）
+CACHE_SIZE_KB = 8192
+MMAP_SIZE = 64 * 1024 * 1024
+
+# 汇总粒度 -> (桶的秒数, 由访问时间'YYYY-mm-dd HH:MM:SS'得到桶起始时间的函数)
+BUCKETS = {
+    'minute': (60, lambda value: value[:16] + ':00'),
+    'hour': (3600, lambda value: value[:13] + ':00:00'),
+    'day': (86400, lambda value: value[:10] + ' 00:00:00')
+}
+
+# 每次查询最多返回的桶数量
+MAX_BUCKETS = 5000
+
+# 按分钟汇总的统计保留的天数，小时和天的汇总一直保留
+MINUTE_ROLLUP_DAYS = 7
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class ConnectionPool:
+    """
+    SQLite连接池
+    
+    连接在线程之间复用但同一时间只被一个线程使用；空闲连接超过size个时关闭多余的连接
+    """
+    
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # WAL模式下NORMAL在提交时不fsync，断电最多丢失最近的事务，不会损坏数据库
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE}')
+        conn.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
+        # 汇总表更新唯一IP草图
+        conn.create_function('hll_update', 2, hyperloglog.update, deterministic=True)
+        return conn
     
-    # 创建访问日志表
+    @contextmanager
+    def connection(self):
+        """取出一个连接，使用完毕后放回连接池；出错时回滚未提交的事务"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                conn.close()
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _connection():
+    """从连接池取出连接，DB_PATH被修改后（如测试中）重建连接池"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        pool = _pool
+    return pool.connection()
+
+def _migration_1(cursor):
+    """创建访问日志表和项目统计表"""
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS access_logs (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,7 +133,6 @@ def init_db():
     )
     ''')
     
-    # 创建项目统计表
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS project_stats (
         project_id TEXT PRIMARY KEY,
@@ -52,147 +143,503 @@ def init_db():
         unique_ips INTEGER DEFAULT 0
     )
     ''')
+
+def _migration_2(cursor):
+    """创建项目访问IP表，每个项目的每个IP只有一行，用于增量维护唯一IP数量"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS project_ips (
+        project_id TEXT NOT NULL,
+        ip_address TEXT NOT NULL,
+        PRIMARY KEY (project_id, ip_address)
+    ) WITHOUT ROWID
+    ''')
     
-    conn.commit()
-    conn.close()
+    # 已有的数据库从访问日志中补全IP表，并以此校正唯一IP数量
+    cursor.execute('''
+    INSERT OR IGNORE INTO project_ips (project_id, ip_address)
+    SELECT DISTINCT project_id, ip_address FROM access_logs WHERE ip_address IS NOT NULL
+    ''')
+    cursor.execute('''
+    UPDATE project_stats SET unique_ips = (
+        SELECT COUNT(*) FROM project_ips WHERE project_ips.project_id = project_stats.project_id
+    )
+    ''')
 
-def log_access(project_id, ip_address, user_agent=None, request_method=None, 
-               endpoint=None, params=None, status_code=200, response_time=0, user_id=None):
+def _migration_3(cursor):
+    """为按项目查询的访问日志建立索引"""
+    # 日志列表按(访问时间, ID)做游标分页，以及按项目计数；索引包含ID以避免对同一秒内的日志排序
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_access_logs_project_time_id
+    ON access_logs (project_id, access_time, id)
+    ''')
+    # IP统计的GROUP BY和唯一IP计数只需扫描索引
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_access_logs_project_ip
+    ON access_logs (project_id, ip_address)
+    ''')
+
+def _migration_4(cursor):
+    """创建按时间桶汇总的访问统计表，并由已有的访问日志生成汇总"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS access_rollups (
+        project_id TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        bucket_start TIMESTAMP NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        api INTEGER NOT NULL DEFAULT 0,
+        web INTEGER NOT NULL DEFAULT 0,
+        errors INTEGER NOT NULL DEFAULT 0,
+        latency_sum REAL NOT NULL DEFAULT 0,
+        latency_max REAL NOT NULL DEFAULT 0,
+        ip_sketch BLOB,
+        PRIMARY KEY (project_id, bucket, bucket_start)
+    ) WITHOUT ROWID
+    ''')
+    
+    logs = cursor.connection.execute('''
+    SELECT project_id, access_time, ip_address, user_agent, request_method,
+           endpoint, params, status_code, response_time, user_id
+    FROM access_logs
+    ''')
+    while True:
+        rows = logs.fetchmany(10000)
+        if not rows:
+            break
+        _update_rollups(cursor, rows)
+
+# 数据库结构迁移，按顺序执行；PRAGMA user_version记录已执行的迁移数量，
+# 新的结构修改只能追加到末尾
+MIGRATIONS = [
+    _migration_1,
+    _migration_2,
+    _migration_3,
+    _migration_4
+]
+
+def migrate(conn):
+    """
+    执行尚未执行的迁移，每个迁移和版本号更新在同一个事务中提交
+    
+    Returns:
+        迁移后的结构版本
     """
-    记录项目访问日志
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN')
+            migration(cursor)
+            cursor.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+    return version
+
+def init_db():
+    """初始化数据库，切换到WAL日志模式（保存在数据库文件中），创建或升级访问日志相关的表和索引"""
+    with _connection() as conn:
+        conn.execute('PRAGMA journal_mode = WAL')
+        migrate(conn)
+
+def _access_row(project_id, ip_address, user_agent=None, request_method=None,
+                endpoint=None, params=None, status_code=200, response_time=0, user_id=None):
+    """构造access_logs表的一行，访问时间取调用时的时间"""
+    return (
+        project_id,
+        datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        ip_address,
+        user_agent,
+        request_method,
+        endpoint,
+        json.dumps(params) if params else None,
+        status_code,
+        response_time,
+        user_id
+    )
+
+def _update_rollups(cursor, rows):
+    """按项目和时间桶汇总一批访问日志，累加到汇总表"""
+    # (项目ID, 粒度, 桶起始时间) -> [总数, API访问数, Web访问数, 错误数, 延迟之和, 最大延迟, {寄存器索引: 取值}]
+    rollups = {}
+    # IP地址 -> 寄存器，同一批中的IP只计算一次哈希
+    registers = {}
+    for row in rows:
+        project_id, access_time, ip_address, endpoint, status_code, response_time = \
+            row[0], row[1], row[2], row[5], row[7], row[8]
+        is_api = bool(endpoint and '/api/' in endpoint)
+        is_error = status_code is not None and status_code >= 400
+        response_time = response_time or 0
+        if ip_address is not None:
+            register = registers.get(ip_address)
+            if register is None:
+                register = registers[ip_address] = hyperloglog.hash_value(ip_address)
+        for bucket, (_, bucket_start) in BUCKETS.items():
+            key = (project_id, bucket, bucket_start(access_time))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = [0, 0, 0, 0, 0.0, 0.0, {}]
+            rollup[0] += 1
+            rollup[1 if is_api else 2] += 1
+            rollup[3] += is_error
+            rollup[4] += response_time
+            rollup[5] = max(rollup[5], response_time)
+            if ip_address is not None:
+                index, rank = register
+                if rank > rollup[6].get(index, 0):
+                    rollup[6][index] = rank
+    
+    # 草图只传入这一批涉及的寄存器，由hll_update在已有草图上更新
+    cursor.executemany('''
+    INSERT INTO access_rollups (
+        project_id, bucket, bucket_start, total, api, web, errors, latency_sum, latency_max, ip_sketch
+    ) VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, CASE WHEN ?10 = x'' THEN NULL ELSE hll_update(NULL, ?10) END)
+    ON CONFLICT(project_id, bucket, bucket_start) DO UPDATE SET
+        total = total + excluded.total,
+        api = api + excluded.api,
+        web = web + excluded.web,
+        errors = errors + excluded.errors,
+        latency_sum = latency_sum + excluded.latency_sum,
+        latency_max = max(latency_max, excluded.latency_max),
+        ip_sketch = CASE WHEN ?10 = x'' THEN ip_sketch ELSE hll_update(ip_sketch, ?10) END
+    ''', [
+        key + (total, api, web, errors, latency_sum, latency_max,
+               bytes(value for register in sketch.items() for value in register))
+        for key, (total, api, web, errors, latency_sum, latency_max, sketch) in rollups.items()
+    ])
+
+def prune_minute_rollups(days=MINUTE_ROLLUP_DAYS):
+    """删除早于days天的按分钟汇总"""
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime(TIME_FORMAT)
+    with _connection() as conn:
+        conn.execute("DELETE FROM access_rollups WHERE bucket = 'minute' AND bucket_start < ?", (cutoff,))
+        conn.commit()
+
+def write_batch(rows):
+    """
+    在一个事务中写入一批访问日志，并按项目汇总更新统计
     
     Args:
-        project_id: 项目ID
-        ip_address: 访问者IP地址
-        user_agent: 用户代理信息
-        request_method: 请求方法（GET/POST等）
-        endpoint: 访问的端点
-        params: 请求参数（字典形式）
-        status_code: 响应状态码
-        response_time: 响应时间（秒）
-        user_id: 用户ID（如果已登录）
+        rows: _access_row构造的行列表
     """
-    try:
-        conn = sqlite3.connect(DB_PATH)
+    with _connection() as conn:
         cursor = conn.cursor()
         
         # 记录访问日志
-        cursor.execute('''
+        cursor.executemany('''
         INSERT INTO access_logs (
             project_id, access_time, ip_address, user_agent, request_method, 
             endpoint, params, status_code, response_time, user_id
         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            project_id, 
-            datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-            ip_address,
-            user_agent,
-            request_method,
-            endpoint,
-            json.dumps(params) if params else None,
-            status_code,
-            response_time,
-            user_id
-        ))
-        
-        # 更新项目统计
-        is_api = endpoint and '/api/' in endpoint
+        ''', rows)
         
-        # 检查项目是否已存在统计记录
-        cursor.execute('SELECT * FROM project_stats WHERE project_id = ?', (project_id,))
-        project_stat = cursor.fetchone()
+        # 按项目汇总本批次的访问：项目ID -> [最后访问时间, 总数, API访问数, IP集合]
+        totals = {}
+        for row in rows:
+            project_id, access_time, ip_address, endpoint = row[0], row[1], row[2], row[5]
+            total = totals.setdefault(project_id, [access_time, 0, 0, set()])
+            total[0] = max(total[0], access_time)
+            total[1] += 1
+            if endpoint and '/api/' in endpoint:
+                total[2] += 1
+            if ip_address is not None:
+                total[3].add(ip_address)
         
-        if project_stat:
-            # 更新现有记录
-            cursor.execute('''
-            UPDATE project_stats SET 
-                last_access = ?, 
-                total_accesses = total_accesses + 1,
-                api_accesses = api_accesses + ? 
-            WHERE project_id = ?
-            ''', (
-                datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                1 if is_api else 0,
-                project_id
-            ))
-        else:
-            # 创建新记录
-            cursor.execute('''
-            INSERT INTO project_stats (
-                project_id, last_access, total_accesses, api_accesses, web_accesses
-            ) VALUES (?, ?, 1, ?, ?)
-            ''', (
-                project_id,
-                datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                1 if is_api else 0,
-                0 if is_api else 1
-            ))
+        # 更新项目统计，不存在时创建记录
+        cursor.executemany('''
+        INSERT INTO project_stats (project_id, last_access, total_accesses, api_accesses, web_accesses)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(project_id) DO UPDATE SET
+            last_access = excluded.last_access,
+            total_accesses = total_accesses + excluded.total_accesses,
+            api_accesses = api_accesses + excluded.api_accesses,
+            web_accesses = web_accesses + excluded.web_accesses
+        ''', [
+            (project_id, last_access, count, api_count, count - api_count)
+            for project_id, (last_access, count, api_count, _) in totals.items()
+        ])
         
-        conn.commit()
-        
-        # 更新唯一IP数量（这是CPU密集型操作，可以考虑异步执行）
-        cursor.execute('''
-        SELECT COUNT(DISTINCT ip_address) FROM access_logs WHERE project_id = ?
-        ''', (project_id,))
-        unique_ips = cursor.fetchone()[0]
+        # 增量更新唯一IP数量：只有第一次出现的IP会插入IP表，插入的行数即新增的唯一IP数
+        for project_id, (_, _, _, ips) in totals.items():
+            cursor.executemany(
+                'INSERT OR IGNORE INTO project_ips (project_id, ip_address) VALUES (?, ?)',
+                [(project_id, ip_address) for ip_address in ips]
+            )
+            if cursor.rowcount > 0:
+                cursor.execute(
+                    'UPDATE project_stats SET unique_ips = unique_ips + ? WHERE project_id = ?',
+                    (cursor.rowcount, project_id)
+                )
         
-        cursor.execute('''
-        UPDATE project_stats SET unique_ips = ? WHERE project_id = ?
-        ''', (unique_ips, project_id))
+        # 累加到按分钟、小时、天的汇总
+        _update_rollups(cursor, rows)
         
         conn.commit()
-        conn.close()
-        
+
+def log_access(project_id, ip_address, user_agent=None, request_method=None, 
+               endpoint=None, params=None, status_code=200, response_time=0, user_id=None):
+    """
+    同步记录项目访问日志
+    
+    Args:
+        project_id: 项目ID
+        ip_address: 访问者IP地址
+        user_agent: 用户代理信息
+        request_method: 请求方法（GET/POST等）
+        endpoint: 访问的端点
+        params: 请求参数（字典形式）
+        status_code: 响应状态码
+        response_time: 响应时间（秒）
+        user_id: 用户ID（如果已登录）
+    """
+    try:
+        write_batch([_access_row(project_id, ip_address, user_agent, request_method,
+                                 endpoint, params, status_code, response_time, user_id)])
         return True
     except Exception as e:
         print(f"记录访问日志时出错: {str(e)}")
         return False
 
-def get_project_access_logs(project_id, limit=100, offset=0):
+class AccessLogWriter:
+    """
+    后台批量写入访问日志
+    
+    请求线程只把日志行放入有界队列，后台线程攒够batch_size条或等待flush_interval秒后
+    在一个事务中写入；队列已满时最多等待block_timeout秒，仍然写不进去则丢弃并计数
     """
-    获取项目的访问日志
+    
+    def __init__(self, batch_size=256, flush_interval=0.5, max_queue=10000, block_timeout=0):
+        """
+        初始化写入器
+        
+        Args:
+            batch_size: 每批次最多写入的日志条数
+            flush_interval: 队列中有日志时最长等待的秒数
+            max_queue: 队列容量
+            block_timeout: 队列已满时请求线程最多等待的秒数，0表示直接丢弃
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(max_queue)
+        self._stopping = threading.Event()
+        self._thread = None
+        # 请求线程和后台线程都会更新计数，读写都在锁内进行
+        self._stats_lock = threading.Lock()
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+    
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+    
+    def get_stats(self):
+        """获取计数的副本"""
+        with self._stats_lock:
+            return dict(self.stats)
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+        self._thread.start()
+    
+    def submit(self, row):
+        """
+        把一行日志放入队列
+        
+        Returns:
+            是否成功入队，队列已满被丢弃时返回False
+        """
+        try:
+            if self.block_timeout:
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        self._count(queued=1)
+        return True
+    
+    def _run(self):
+        last_prune = 0
+        while not self._stopping.is_set() or not self._queue.empty():
+            # 每小时清理一次过期的按分钟汇总
+            if time.monotonic() - last_prune > 3600:
+                last_prune = time.monotonic()
+                try:
+                    prune_minute_rollups()
+                except Exception as e:
+                    print(f"清理访问统计汇总时出错: {str(e)}")
+            try:
+                rows = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            # 攒够一批或等满flush_interval后写入
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    rows.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # 停止时不再等待，取出队列中剩余的日志
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(rows)
+    
+    def _write(self, rows):
+        try:
+            write_batch(rows)
+            self._count(written=len(rows), batches=1)
+        except Exception as e:
+            self._count(errors=1, dropped=len(rows))
+            print(f"批量写入访问日志时出错: {str(e)}")
+    
+    def stop(self, timeout=5):
+        """停止写入器，写入队列中剩余的日志"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+_writer = None
+
+def start_writer(batch_size=256, flush_interval=0.5, max_queue=10000, block_timeout=0):
+    """
+    启动后台写入器，之后enqueue_access记录的日志由后台线程批量写入；
+    进程退出时写入队列中剩余的日志
+    
+    Returns:
+        写入器，重复调用时返回已启动的写入器
+    """
+    global _writer
+    if _writer is not None:
+        return _writer
+    _writer = AccessLogWriter(batch_size, flush_interval, max_queue, block_timeout)
+    _writer.start()
+    atexit.register(_writer.stop)
+    return _writer
+
+def enqueue_access(project_id, ip_address, user_agent=None, request_method=None, 
+                   endpoint=None, params=None, status_code=200, response_time=0, user_id=None):
+    """
+    异步记录项目访问日志，参数与log_access相同；写入器未启动时同步写入
+    
+    Returns:
+        是否成功记录（入队），队列已满被丢弃时返回False
+    """
+    if _writer is None:
+        return log_access(project_id, ip_address, user_agent, request_method,
+                          endpoint, params, status_code, response_time, user_id)
+    return _writer.submit(_access_row(project_id, ip_address, user_agent, request_method,
+                                      endpoint, params, status_code, response_time, user_id))
+
+def get_writer_stats():
+    """获取后台写入器的计数（入队、写入、丢弃、批次、出错），未启动时返回None"""
+    return _writer.get_stats() if _writer is not None else None
+
+def get_project_access_logs(project_id, limit=100, offset=0, before_id=None, after_time=None, after_id=None):
+    """
+    获取项目的访问日志，按访问时间从新到旧排列
+    
+    推荐使用游标翻页：before_id向更早的记录翻页，after_id向更新的记录翻页，
+    每页的查询代价与页的位置无关；offset只为兼容旧的调用方保留，越往后越慢
     
     Args:
         project_id: 项目ID
         limit: 返回记录数量限制
         offset: 分页偏移量
+        before_id: 只返回排在该日志之后（更早）的记录，取上一页返回的next_before
+        after_time: 只返回访问时间晚于该时间的记录（'YYYY-mm-dd HH:MM:SS'）
+        after_id: 只返回排在该日志之前（更新）且紧邻它的一页记录，取上一页返回的next_after
         
     Returns:
-        访问日志列表
+        访问日志列表、总数（取自项目统计），以及更早一页的游标next_before和更新一页的游标next_after，
+        没有更早/更新的记录时为None
+        
+    Raises:
+        ValueError: 游标不是该项目的日志，或同时指定了before_id和after_id
     """
+    if before_id is not None and after_id is not None:
+        raise ValueError('before_id和after_id不能同时指定')
+    
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # 启用行工厂，使结果可以通过列名访问
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT * FROM access_logs 
-        WHERE project_id = ? 
-        ORDER BY access_time DESC
-        LIMIT ? OFFSET ?
-        ''', (project_id, limit, offset))
-        
-        logs = [dict(row) for row in cursor.fetchall()]
-        
-        # 获取记录总数
-        cursor.execute('SELECT COUNT(*) FROM access_logs WHERE project_id = ?', (project_id,))
-        total_count = cursor.fetchone()[0]
-        
-        conn.close()
+        with _connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row  # 启用行工厂，使结果可以通过列名访问
+            
+            conditions = ['project_id = ?']
+            args = [project_id]
+            cursor_id = before_id if before_id is not None else after_id
+            if cursor_id is not None:
+                # 游标为(访问时间, ID)，同一秒内的日志按ID排序
+                cursor.execute(
+                    'SELECT access_time FROM access_logs WHERE id = ? AND project_id = ?',
+                    (cursor_id, project_id)
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise ValueError(f'找不到该项目的日志: {cursor_id}')
+                conditions.append('(access_time, id) > (?, ?)' if after_id is not None else '(access_time, id) < (?, ?)')
+                args.extend([row['access_time'], cursor_id])
+            if after_time is not None:
+                conditions.append('access_time > ?')
+                args.append(after_time)
+            
+            # 向更新的记录翻页时按升序取紧邻游标的一页，再反转为从新到旧；
+            # 多取一条，用于判断翻页方向上是否还有记录
+            order = 'ASC' if after_id is not None else 'DESC'
+            cursor.execute(f'''
+            SELECT * FROM access_logs 
+            WHERE {' AND '.join(conditions)}
+            ORDER BY access_time {order}, id {order}
+            LIMIT ? OFFSET ?
+            ''', args + [limit + 1, offset])
+            
+            logs = [dict(row) for row in cursor.fetchall()]
+            more = len(logs) > limit
+            logs = logs[:limit]
+            if after_id is not None:
+                logs.reverse()
+            
+            # 游标本身所在的一侧一定还有记录
+            if after_id is not None:
+                has_older, has_newer = True, more
+            else:
+                has_older, has_newer = more, before_id is not None
+            next_before = logs[-1]['id'] if logs and has_older else None
+            next_after = logs[0]['id'] if logs and has_newer else None
+            
+            # 总数取自写入时维护的计数，不扫描日志表
+            cursor.execute('SELECT total_accesses FROM project_stats WHERE project_id = ?', (project_id,))
+            row = cursor.fetchone()
+            total_count = row['total_accesses'] if row else 0
         
         return {
             'logs': logs,
             'total': total_count,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_before': next_before,
+            'next_after': next_after
         }
+    except ValueError:
+        # 无效的游标由调用方返回错误，不能当作没有更多记录的最后一页
+        raise
     except Exception as e:
         print(f"获取访问日志时出错: {str(e)}")
         return {
             'logs': [],
             'total': 0,
             'limit': limit,
-            'offset': offset
+            'offset': offset,
+            'next_before': None,
+            'next_after': None
         }
 
 def get_project_stats(project_id=None):
@@ -206,24 +653,94 @@ def get_project_stats(project_id=None):
         项目统计信息
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with _connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            
+            if project_id:
+                cursor.execute('SELECT * FROM project_stats WHERE project_id = ?', (project_id,))
+                result = cursor.fetchone()
+                stats = dict(result) if result else None
+            else:
+                cursor.execute('SELECT * FROM project_stats ORDER BY last_access DESC')
+                stats = [dict(row) for row in cursor.fetchall()]
         
-        if project_id:
-            cursor.execute('SELECT * FROM project_stats WHERE project_id = ?', (project_id,))
-            result = cursor.fetchone()
-            stats = dict(result) if result else None
-        else:
-            cursor.execute('SELECT * FROM project_stats ORDER BY last_access DESC')
-            stats = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
         return stats
     except Exception as e:
         print(f"获取项目统计时出错: {str(e)}")
         return [] if project_id is None else None
 
+def get_project_rollups(project_id, bucket='hour', start=None, end=None):
+    """
+    按时间桶获取项目访问统计，只查询汇总表
+    
+    Args:
+        project_id: 项目ID
+        bucket: 汇总粒度，minute、hour或day
+        start: 开始时间（datetime，包含），默认为结束时间之前60个桶
+        end: 结束时间（datetime，不包含），默认为当前时间
+        
+    Returns:
+        包含每个桶的统计series和整个时间范围的汇总summary的字典，
+        唯一IP数为HyperLogLog估计值
+        
+    Raises:
+        ValueError: 粒度无效、时间范围无效或桶数量超过MAX_BUCKETS
+    """
+    if bucket not in BUCKETS:
+        raise ValueError(f'无效的汇总粒度: {bucket}')
+    seconds, bucket_start = BUCKETS[bucket]
+    if end is None:
+        end = datetime.datetime.now()
+    if start is None:
+        start = end - datetime.timedelta(seconds=seconds * 60)
+    if start >= end:
+        raise ValueError('开始时间必须早于结束时间')
+    if (end - start).total_seconds() / seconds > MAX_BUCKETS:
+        raise ValueError(f'时间范围内的桶数量超过{MAX_BUCKETS}，请使用更粗的汇总粒度')
+    
+    with _connection() as conn:
+        rows = conn.execute('''
+        SELECT bucket_start, total, api, web, errors, latency_sum, latency_max, ip_sketch
+        FROM access_rollups
+        WHERE project_id = ? AND bucket = ? AND bucket_start >= ? AND bucket_start < ?
+        ORDER BY bucket_start
+        ''', (project_id, bucket, bucket_start(start.strftime(TIME_FORMAT)), end.strftime(TIME_FORMAT))).fetchall()
+    
+    series = []
+    summary = {'total': 0, 'api': 0, 'web': 0, 'errors': 0, 'latency_sum': 0.0, 'max_latency': 0.0}
+    sketch = None
+    for time_value, total, api, web, errors, latency_sum, latency_max, ip_sketch in rows:
+        series.append({
+            'time': time_value,
+            'total': total,
+            'api': api,
+            'web': web,
+            'errors': errors,
+            'avg_latency': latency_sum / total if total else 0,
+            'max_latency': latency_max,
+            'unique_ips': hyperloglog.estimate(ip_sketch)
+        })
+        summary['total'] += total
+        summary['api'] += api
+        summary['web'] += web
+        summary['errors'] += errors
+        summary['latency_sum'] += latency_sum
+        summary['max_latency'] = max(summary['max_latency'], latency_max)
+        sketch = hyperloglog.merge(sketch, ip_sketch)
+    
+    latency_sum = summary.pop('latency_sum')
+    summary['avg_latency'] = latency_sum / summary['total'] if summary['total'] else 0
+    summary['unique_ips'] = hyperloglog.estimate(sketch)
+    
+    return {
+        'bucket': bucket,
+        'from': start.strftime(TIME_FORMAT),
+        'to': end.strftime(TIME_FORMAT),
+        'series': series,
+        'summary': summary
+    }
+
 def get_project_ip_stats(project_id, limit=10):
     """
     获取项目访问IP统计
@@ -236,20 +753,17 @@ def get_project_ip_stats(project_id, limit=10):
         IP访问统计列表
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT ip_address, COUNT(*) as count 
-        FROM access_logs 
-        WHERE project_id = ? 
-        GROUP BY ip_address 
-        ORDER BY count DESC
-        LIMIT ?
-        ''', (project_id, limit))
-        
-        ip_stats = [{'ip': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        conn.close()
+        with _connection() as conn:
+            cursor = conn.execute('''
+            SELECT ip_address, COUNT(*) as count 
+            FROM access_logs 
+            WHERE project_id = ? 
+            GROUP BY ip_address 
+            ORDER BY count DESC
+            LIMIT ?
+            ''', (project_id, limit))
+            
+            ip_stats = [{'ip': row[0], 'count': row[1]} for row in cursor.fetchall()]
         
         return ip_stats
     except Exception as e:
@@ -0,0 +1,477 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置备份存储模块
+
+按内容寻址保存配置文件的历史版本：文件内容以SHA-256为键压缩后存为一个对象，
+内容相同的版本只保存一次；索引表按（项目, 修订号）记录该修订时两个配置文件的内容。
+每隔K个修订保存一次完整检查点，其余修订只保存相对上一个版本的结构化差异
+（config.json为JSON Patch，system.conf为区段/键修改），
+重建任一版本最多从检查点应用K-1个差异。
+按保留策略（最近N个、按小时和按天抽稀）定期清理过期版本及不再被引用的对象
+"""
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import datetime
+import sqlite3
+import threading
+
+from utils import config_delta
+
+# 备份目录，对象按键的前两位分目录存放
+BACKUP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'backups')
+OBJECTS_DIR = os.path.join(BACKUP_DIR, 'objects')
+DB_PATH = os.path.join(BACKUP_DIR, 'index.db')
+
+# 默认保留策略：每个项目保留最近50个版本，另外24小时内每小时保留一个，30天内每天保留一个
+KEEP_LAST = 50
+KEEP_HOURLY = 24
+KEEP_DAILY = 30
+
+# 默认每20个修订保存一次完整检查点
+CHECKPOINT_INTERVAL = 20
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SYSTEM_FILE = 'system.conf'
+CONFIG_FILE = 'config.json'
+
+# 确保备份目录存在
+os.makedirs(OBJECTS_DIR, exist_ok=True)
+
+# 保存和清理互斥，避免清理时删除刚被新版本引用的对象
+_lock = threading.Lock()
+
+_pruner = None
+
+# 项目ID -> (修订号, system.conf内容, config.json内容)，最近一次保存的版本，计算下一个差异时免去重建
+_latest = {}
+
+# 文件 -> (解析, 计算差异, 应用差异, 序列化)
+_FORMATS = {
+    SYSTEM_FILE: (config_delta.load_ini, config_delta.diff_ini, config_delta.apply_ini_delta, config_delta.dump_ini),
+    CONFIG_FILE: (config_delta.load_json, config_delta.diff_json, config_delta.apply_json_patch, config_delta.dump_json)
+}
+
+# 文件 -> (完整内容列, 差异列)
+_COLUMNS = {
+    SYSTEM_FILE: ('system_blob', 'system_delta'),
+    CONFIG_FILE: ('config_blob', 'config_delta')
+}
+
+
+def init_db():
+    """初始化数据库，创建版本索引表"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # 每行是项目在某个修订时的两个配置文件：blob为完整内容的对象键，
+    # delta为相对上一行同一文件的压缩差异，两者都为NULL表示该文件不存在；
+    # chain为距上一个检查点的差异行数，0表示检查点
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS versions (
+        project_id TEXT NOT NULL,
+        revision INTEGER NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        system_blob TEXT,
+        system_size INTEGER,
+        config_blob TEXT,
+        config_size INTEGER,
+        system_delta BLOB,
+        config_delta BLOB,
+        chain INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (project_id, revision)
+    )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def _object_path(key):
+    return os.path.join(OBJECTS_DIR, key[:2], key[2:])
+
+
+def put_blob(data):
+    """
+    保存内容对象，内容已存在时不重复写入
+
+    Args:
+        data: 文件内容字节串
+
+    Returns:
+        对象键（内容的SHA-256）
+    """
+    key = hashlib.sha256(data).hexdigest()
+    path = _object_path(key)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data, 6))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    return key
+
+
+def get_blob(key):
+    """
+    读取内容对象
+
+    Args:
+        key: 对象键
+
+    Returns:
+        文件内容字节串
+    """
+    with open(_object_path(key), 'rb') as f:
+        return zlib.decompress(f.read())
+
+
+def make_delta(file, old_data, new_data):
+    """
+    计算同一配置文件两个版本之间的结构化差异
+
+    Args:
+        file: 文件名（system.conf或config.json）
+        old_data: 旧版本内容字节串
+        new_data: 新版本内容字节串
+
+    Returns:
+        压缩后的差异，无法解析或应用差异不能逐字节还原新版本时返回None
+    """
+    load, diff, apply, dump = _FORMATS[file]
+    try:
+        operations = diff(load(old_data), load(new_data))
+        # 文件不是按配置的写入格式保存的（手工编辑、注释等）时只能保存完整内容
+        if dump(apply(load(old_data), operations)) != new_data:
+            return None
+    except Exception:
+        return None
+    return zlib.compress(json.dumps(operations, ensure_ascii=False).encode('utf-8'), 6)
+
+
+def apply_deltas(file, data, deltas):
+    """
+    对文件内容依次应用make_delta计算的差异，只解析和序列化一次
+
+    Returns:
+        新版本内容字节串
+    """
+    load, _, apply, dump = _FORMATS[file]
+    document = load(data)
+    for delta in deltas:
+        document = apply(document, json.loads(zlib.decompress(delta).decode('utf-8')))
+    return dump(document)
+
+
+def _row_to_version(row):
+    return {
+        'revision': row[0],
+        'created_at': row[1],
+        'system_size': row[2],
+        'config_size': row[3]
+    }
+
+
+def has_versions(project_id):
+    """判断项目是否已有历史版本"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute('SELECT 1 FROM versions WHERE project_id = ? LIMIT 1', (project_id,)).fetchone()
+    finally:
+        conn.close()
+    return row is not None
+
+
+def _read_file(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _read_file_version(conn, project_id, revision, file):
+    """从不晚于revision的最近一个完整内容开始，依次应用差异重建文件内容"""
+    blob_column, delta_column = _COLUMNS[file]
+    rows = conn.execute(f'''
+    SELECT {blob_column}, {delta_column} FROM versions
+    WHERE project_id = ? AND revision <= ? ORDER BY revision DESC
+    ''', (project_id, revision))
+
+    deltas = []
+    data = None
+    for blob, delta in rows:
+        if delta is None:
+            data = get_blob(blob) if blob is not None else None
+            break
+        deltas.append(delta)
+    rows.close()
+
+    if deltas:
+        data = apply_deltas(file, data, reversed(deltas))
+    return data
+
+
+def _read_version(conn, project_id, revision):
+    if not conn.execute('SELECT 1 FROM versions WHERE project_id = ? AND revision = ?',
+                        (project_id, revision)).fetchone():
+        return None
+    return (_read_file_version(conn, project_id, revision, SYSTEM_FILE),
+            _read_file_version(conn, project_id, revision, CONFIG_FILE))
+
+
+def save_version(project_id, revision, system_conf_path, config_json_path, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """
+    读取项目两个配置文件的当前内容，记录为指定修订的版本
+
+    距上一个检查点不足checkpoint_interval个修订时只保存相对上一个版本的差异
+
+    Args:
+        project_id: 项目ID
+        revision: 文件内容对应的配置修订号
+        system_conf_path: system.conf路径
+        config_json_path: config.json路径
+        checkpoint_interval: 完整检查点的间隔修订数
+    """
+    contents = {
+        SYSTEM_FILE: _read_file(system_conf_path),
+        CONFIG_FILE: _read_file(config_json_path)
+    }
+
+    with _lock:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            previous = conn.execute('''
+            SELECT revision, chain FROM versions
+            WHERE project_id = ? AND revision < ? ORDER BY revision DESC LIMIT 1
+            ''', (project_id, revision)).fetchone()
+
+            previous_contents = None
+            if previous is not None and previous[1] + 1 < checkpoint_interval:
+                latest = _latest.get(project_id)
+                if latest is not None and latest[0] == previous[0]:
+                    previous_contents = {SYSTEM_FILE: latest[1], CONFIG_FILE: latest[2]}
+                else:
+                    system_data, config_data = _read_version(conn, project_id, previous[0])
+                    previous_contents = {SYSTEM_FILE: system_data, CONFIG_FILE: config_data}
+
+            stored = {}
+            for file, data in contents.items():
+                delta = None
+                if previous_contents is not None and previous_contents[file] is not None and data is not None:
+                    delta = make_delta(file, previous_contents[file], data)
+                blob = put_blob(data) if delta is None and data is not None else None
+                stored[file] = (blob, delta)
+
+            has_delta = any(delta is not None for _, delta in stored.values())
+            conn.execute('''
+            INSERT OR REPLACE INTO versions
+                (project_id, revision, created_at, system_blob, system_size, config_blob, config_size,
+                 system_delta, config_delta, chain)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                project_id,
+                revision,
+                datetime.datetime.now().strftime(TIME_FORMAT),
+                stored[SYSTEM_FILE][0],
+                len(contents[SYSTEM_FILE]) if contents[SYSTEM_FILE] is not None else None,
+                stored[CONFIG_FILE][0],
+                len(contents[CONFIG_FILE]) if contents[CONFIG_FILE] is not None else None,
+                stored[SYSTEM_FILE][1],
+                stored[CONFIG_FILE][1],
+                previous[1] + 1 if has_delta else 0
+            ))
+            conn.commit()
+            _latest[project_id] = (revision, contents[SYSTEM_FILE], contents[CONFIG_FILE])
+        finally:
+            conn.close()
+
+
+def read_version(project_id, revision):
+    """
+    重建指定修订时两个配置文件的内容
+
+    Returns:
+        (system.conf内容, config.json内容)，文件不存在时对应项为None；
+        版本不存在或已被清理时返回None
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return _read_version(conn, project_id, revision)
+    finally:
+        conn.close()
+
+
+def list_versions(project_id, before=None, limit=20):
+    """
+    分页列出项目的历史版本，按修订号从新到旧排列
+
+    Args:
+        project_id: 项目ID
+        before: 只返回修订号小于该值的版本，用于翻页
+        limit: 返回的版本数量
+
+    Returns:
+        版本字典列表
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute('''
+        SELECT revision, created_at, system_size, config_size
+        FROM versions WHERE project_id = ? AND revision < ?
+        ORDER BY revision DESC LIMIT ?
+        ''', (project_id, before if before is not None else 2 ** 63 - 1, limit)).fetchall()
+    finally:
+        conn.close()
+    return [_row_to_version(row) for row in rows]
+
+
+def drop_project(project_id):
+    """删除项目的所有历史版本，对象在下次清理时回收"""
+    with _lock:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            conn.execute('DELETE FROM versions WHERE project_id = ?', (project_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        _latest.pop(project_id, None)
+
+
+def select_expired(versions, now, keep_last=KEEP_LAST, keep_hourly=KEEP_HOURLY, keep_daily=KEEP_DAILY):
+    """
+    按保留策略挑选过期的版本
+
+    Args:
+        versions: 同一项目的(修订号, created_at)列表，按修订号从新到旧排列
+        now: 当前时间（datetime）
+        keep_last: 无条件保留的最近版本数
+        keep_hourly: 按小时抽稀的小时数，每小时保留最新的一个版本
+        keep_daily: 按天抽稀的天数，每天保留最新的一个版本
+
+    Returns:
+        过期版本的修订号列表
+    """
+    expired = []
+    hours = set()
+    days = set()
+    for i, (revision, created_at) in enumerate(versions):
+        created = datetime.datetime.strptime(created_at, TIME_FORMAT)
+        age = now - created
+        hour = created.strftime('%Y%m%d%H')
+        day = created.strftime('%Y%m%d')
+        keep = (i < keep_last
+                or (age < datetime.timedelta(hours=keep_hourly) and hour not in hours)
+                or (age < datetime.timedelta(days=keep_daily) and day not in days))
+        if not keep:
+            expired.append(revision)
+            continue
+        # 已保留版本所在的小时和天不再额外保留
+        hours.add(hour)
+        days.add(day)
+    return expired
+
+
+def prune(keep_last=KEEP_LAST, keep_hourly=KEEP_HOURLY, keep_daily=KEEP_DAILY):
+    """
+    清理过期版本和不再被引用的对象
+
+    被保留的差异版本的前一个版本过期时，先把它转为检查点，保证剩余版本都能重建
+
+    Returns:
+        (删除的版本数, 删除的对象数)
+    """
+    now = datetime.datetime.now()
+    with _lock:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            expired = []
+            project_ids = [row[0] for row in conn.execute('SELECT DISTINCT project_id FROM versions')]
+            for project_id in project_ids:
+                versions = conn.execute('''
+                SELECT revision, created_at, chain FROM versions
+                WHERE project_id = ? ORDER BY revision DESC
+                ''', (project_id,)).fetchall()
+                project_expired = set(select_expired(
+                    [version[:2] for version in versions], now, keep_last, keep_hourly, keep_daily))
+                if not project_expired:
+                    continue
+
+                # versions按修订号从新到旧排列，versions[i + 1]是versions[i]的前一个版本
+                for i in range(len(versions) - 1):
+                    revision, _, chain = versions[i]
+                    if chain and revision not in project_expired and versions[i + 1][0] in project_expired:
+                        _make_checkpoint(conn, project_id, revision)
+                expired.extend((project_id, revision) for revision in project_expired)
+
+            conn.executemany('DELETE FROM versions WHERE project_id = ? AND revision = ?', expired)
+            conn.commit()
+
+            referenced = set()
+            for system_blob, config_blob in conn.execute('SELECT system_blob, config_blob FROM versions'):
+                referenced.add(system_blob)
+                referenced.add(config_blob)
+        finally:
+            conn.close()
+
+        removed_objects = 0
+        for prefix in os.listdir(OBJECTS_DIR):
+            prefix_dir = os.path.join(OBJECTS_DIR, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if name.endswith('.tmp') or prefix + name in referenced:
+                    continue
+                os.remove(os.path.join(prefix_dir, name))
+                removed_objects += 1
+
+    return len(expired), removed_objects
+
+
+def _make_checkpoint(conn, project_id, revision):
+    """把差异版本转为保存完整内容的检查点"""
+    system_data, config_data = _read_version(conn, project_id, revision)
+    conn.execute('''
+    UPDATE versions SET system_blob = ?, config_blob = ?, system_delta = NULL, config_delta = NULL, chain = 0
+    WHERE project_id = ? AND revision = ?
+    ''', (
+        put_blob(system_data) if system_data is not None else None,
+        put_blob(config_data) if config_data is not None else None,
+        project_id,
+        revision
+    ))
+
+
+def start_pruner(interval=3600, keep_last=KEEP_LAST, keep_hourly=KEEP_HOURLY, keep_daily=KEEP_DAILY):
+    """
+    启动后台清理线程，每隔interval秒按保留策略清理一次
+
+    Returns:
+        清理线程，重复调用时返回已启动的线程
+    """
+    global _pruner
+    if _pruner is not None:
+        return _pruner
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                prune(keep_last, keep_hourly, keep_daily)
+            except Exception as e:
+                print(f"清理配置备份时出错: {str(e)}")
+
+    _pruner = threading.Thread(target=run, name='backup-pruner', daemon=True)
+    _pruner.start()
+    return _pruner
+
+
+# 初始化数据库
+init_db()
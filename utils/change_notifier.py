@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置变更通知模块
+
+写入路径提交变更后发布事件，订阅者（SSE连接）在条件变量上等待，
+有新事件时被立即唤醒，空闲时不占用CPU，也不需要轮询
+"""
+
+import time
+import threading
+from collections import deque
+
+
+class _ProjectChannel:
+    """单个项目的事件通道"""
+
+    def __init__(self, history_size):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=history_size)
+        self.last_id = 0
+
+
+class ChangeNotifier:
+    """按项目分发配置变更事件"""
+
+    def __init__(self, history_size=256):
+        """
+        初始化变更通知器
+
+        Args:
+            history_size: 每个项目保留的最近事件数量，用于断线重连后补发
+        """
+        self.history_size = history_size
+        self._lock = threading.Lock()
+        self._channels = {}
+
+    def _channel(self, project_id):
+        channel = self._channels.get(project_id)
+        if channel is None:
+            with self._lock:
+                channel = self._channels.get(project_id)
+                if channel is None:
+                    channel = _ProjectChannel(self.history_size)
+                    self._channels[project_id] = channel
+        return channel
+
+    def publish(self, project_id, changed_keys=None, event_id=None):
+        """
+        发布变更事件并唤醒该项目的所有订阅者
+
+        Args:
+            project_id: 项目ID
+            changed_keys: 变更的配置路径列表，None表示未知（整体变更）
+            event_id: 事件ID，默认在上一个事件ID的基础上加1
+
+        Returns:
+            发布的事件字典
+        """
+        channel = self._channel(project_id)
+        with channel.condition:
+            if event_id is None:
+                event_id = channel.last_id + 1
+            event = {
+                'id': event_id,
+                'project_id': project_id,
+                'changed_keys': changed_keys,
+                'time': time.time()
+            }
+            channel.last_id = event_id
+            channel.events.append(event)
+            channel.condition.notify_all()
+        return event
+
+    def last_event_id(self, project_id):
+        """获取项目最近一次事件的ID"""
+        return self._channel(project_id).last_id
+
+    def wait(self, project_id, last_id, timeout=None):
+        """
+        等待比last_id更新的事件
+
+        Args:
+            project_id: 项目ID
+            last_id: 订阅者已收到的最后一个事件ID
+            timeout: 最长等待秒数，超时返回空列表
+
+        Returns:
+            (事件列表, 是否丢失了部分事件)，丢失时订阅者应重新拉取完整配置
+        """
+        channel = self._channel(project_id)
+        with channel.condition:
+            if channel.last_id <= last_id:
+                channel.condition.wait_for(lambda: channel.last_id > last_id, timeout)
+            events = [event for event in channel.events if event['id'] > last_id]
+            missed = bool(events) and events[0]['id'] > last_id + 1
+            return events, missed
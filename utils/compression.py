@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+响应压缩模块
+
+根据Accept-Encoding协商压缩算法，并按内容哈希缓存压缩结果，
+同一版本的响应只压缩一次。brotli和zstandard为可选依赖，未安装时只提供gzip
+"""
+
+import gzip
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 小于该字节数的响应不压缩
+MIN_SIZE = 1024
+
+# 缓存的压缩结果数量上限
+CACHE_SIZE = 512
+
+# 支持的压缩算法，按服务端偏好排序
+_compressors = OrderedDict()
+if brotli is not None:
+    _compressors['br'] = lambda data: brotli.compress(data, quality=5)
+if zstandard is not None:
+    _compressors['zstd'] = lambda data: zstandard.ZstdCompressor(level=6).compress(data)
+_compressors['gzip'] = lambda data: gzip.compress(data, compresslevel=6, mtime=0)
+
+ENCODINGS = tuple(_compressors)
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def compress(data, encoding, cache_key=None):
+    """
+    压缩数据
+
+    Args:
+        data: 要压缩的字节串
+        encoding: 压缩算法，取值见ENCODINGS
+        cache_key: 缓存键（如内容哈希），为None时不缓存
+
+    Returns:
+        压缩后的字节串
+    """
+    if cache_key is not None:
+        key = (cache_key, encoding)
+        with _lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+                return cached
+
+    compressed = _compressors[encoding](data)
+
+    if cache_key is not None:
+        with _lock:
+            _cache[key] = compressed
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return compressed
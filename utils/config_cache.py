@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+项目配置缓存模块
+
+按项目缓存组装好的配置数据，以相关文件的(mtime_ns, size, inode)作为校验签名，
+文件未变化时直接返回缓存，避免重复解析system.conf、解密和解析config.json
+"""
+
+import os
+import threading
+
+
+def file_signature(path):
+    """
+    获取文件签名
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        (mtime_ns, size, inode)元组，文件不存在时返回None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def files_signature(paths):
+    """获取一组文件的签名元组"""
+    return tuple(file_signature(path) for path in paths)
+
+
+class ProjectConfigCache:
+    """按项目ID缓存配置数据，写入路径负责调用invalidate"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 项目ID -> (文件路径元组, 签名元组, 数据, 版本)
+        self._entries = {}
+
+    def lookup(self, project_id):
+        """
+        查询缓存，文件签名与缓存时一致才视为命中
+
+        Args:
+            project_id: 项目ID
+
+        Returns:
+            缓存的数据，未命中时返回None
+        """
+        entry = self._entries.get(project_id)
+        if entry is None:
+            return None
+        paths, signature, data, _ = entry
+        if files_signature(paths) != signature:
+            self.invalidate(project_id)
+            return None
+        return data
+
+    def store(self, project_id, paths, signature, data, version=None):
+        """
+        写入缓存
+
+        Args:
+            project_id: 项目ID
+            paths: 数据依赖的文件路径
+            signature: 读取文件之前获取的签名，读取过程中文件被修改时下次查询会自动失效
+            data: 要缓存的数据
+            version: 数据的版本（如修订号），缓存中已有更新版本的数据时不覆盖，
+                避免较早开始的读取在写入提交之后把旧版本写回缓存
+        """
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if version is not None and entry is not None and entry[3] is not None and entry[3] > version:
+                return
+            self._entries[project_id] = (tuple(paths), signature, data, version)
+
+    def invalidate(self, project_id):
+        """丢弃项目的缓存"""
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            self._entries.clear()
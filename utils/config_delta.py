@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置差异模块
+
+计算并应用相邻两个配置版本之间的结构化差异：
+config.json使用JSON Patch（RFC 6902），system.conf使用区段/键级别的修改列表
+"""
+
+import json
+from utils.ini_document import IniDocument
+
+
+def _escape(part):
+    return str(part).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(part):
+    return part.replace('~1', '/').replace('~0', '~')
+
+
+def diff_json(old, new, path=''):
+    """
+    计算两个JSON文档之间的JSON Patch
+
+    Args:
+        old: 旧文档
+        new: 新文档
+        path: 当前位置的JSON Pointer，递归时使用
+
+    Returns:
+        add/replace/remove操作列表
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations = []
+        for key in old:
+            if key not in new:
+                operations.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            child_path = f'{path}/{_escape(key)}'
+            if key not in old:
+                operations.append({'op': 'add', 'path': child_path, 'value': value})
+            else:
+                operations.extend(diff_json(old[key], value, child_path))
+        return operations
+
+    # 1 == True、1 == 1.0，类型不同时也视为变更
+    if type(old) is type(new) and old == new:
+        return []
+    return [{'op': 'replace', 'path': path, 'value': new}]
+
+
+def apply_json_patch(document, operations):
+    """
+    应用JSON Patch（支持add/replace/remove），会原地修改文档
+
+    Returns:
+        修改后的文档（替换根节点时为新对象）
+    """
+    for operation in operations:
+        parts = [_unescape(part) for part in operation['path'].split('/')[1:]]
+        if not parts:
+            document = operation.get('value')
+            continue
+
+        parent = document
+        for part in parts[:-1]:
+            parent = parent[int(part)] if isinstance(parent, list) else parent[part]
+
+        last = parts[-1]
+        op = operation['op']
+        if isinstance(parent, list):
+            index = len(parent) if last == '-' else int(last)
+            if op == 'remove':
+                del parent[index]
+            elif op == 'add':
+                parent.insert(index, operation['value'])
+            else:
+                parent[index] = operation['value']
+        elif op == 'remove':
+            del parent[last]
+        else:
+            parent[last] = operation['value']
+    return document
+
+
+def dump_json(document):
+    """按配置文件的写入格式序列化config.json"""
+    return json.dumps(document, indent=4, ensure_ascii=False).encode('utf-8')
+
+
+def load_json(data):
+    return json.loads(data.decode('utf-8'))
+
+
+def _ini_items(config):
+    return {
+        section: {key: config.get(section, key, raw=True) for key in config.options(section)}
+        for section in config.sections()
+    }
+
+
+def diff_ini(old, new):
+    """
+    计算两个system.conf（IniDocument）之间的区段/键修改
+
+    Args:
+        old: 旧配置
+        new: 新配置
+
+    Returns:
+        修改列表，操作为add_section、remove_section、set、remove
+    """
+    old_items = _ini_items(old)
+    new_items = _ini_items(new)
+    operations = []
+
+    for section in old_items:
+        if section not in new_items:
+            operations.append({'op': 'remove_section', 'section': section})
+
+    for section, keys in new_items.items():
+        previous = old_items.get(section)
+        if previous is None:
+            operations.append({'op': 'add_section', 'section': section})
+            previous = {}
+        for key in previous:
+            if key not in keys:
+                operations.append({'op': 'remove', 'section': section, 'key': key})
+        for key, value in keys.items():
+            if previous.get(key) != value:
+                operations.append({'op': 'set', 'section': section, 'key': key, 'value': value})
+    return operations
+
+
+def apply_ini_delta(config, operations):
+    """应用区段/键修改，会原地修改INI文档，未修改的行（包括注释）保持原样"""
+    for operation in operations:
+        op = operation['op']
+        section = operation['section']
+        if op == 'add_section':
+            config.add_section(section)
+        elif op == 'remove_section':
+            config.remove_section(section)
+        elif op == 'remove':
+            config.remove_option(section, operation['key'])
+        else:
+            config.set(section, operation['key'], operation['value'])
+    return config
+
+
+def dump_ini(config):
+    """按配置文件的写入格式序列化system.conf"""
+    return config.to_string().encode('utf-8')
+
+
+def load_ini(data):
+    config = IniDocument()
+    config.read_string(data.decode('utf-8'))
+    return config
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置批量修改模块
+
+在内存中对system.conf（IniDocument）和config.json（字典）依次应用一组修改操作，
+支持{path, value}简写和JSON Patch（RFC 6902）的add/replace/remove/test操作。
+路径可以是点分格式system.section.key、config.a.b，也可以是JSON Pointer格式/system/section/key、/config/a/b
+"""
+
+import copy
+
+SUPPORTED_OPS = ('set', 'add', 'replace', 'remove', 'test')
+
+
+class PatchError(Exception):
+    """单个修改操作无法应用"""
+
+
+def parse_path(path):
+    """
+    解析配置路径
+
+    Args:
+        path: 点分路径或JSON Pointer
+
+    Returns:
+        (目标文件, 路径片段列表)，目标文件为'system'或'config'
+    """
+    if not isinstance(path, str) or not path:
+        raise PatchError('路径不能为空')
+
+    if path.startswith('/'):
+        parts = [part.replace('~1', '/').replace('~0', '~') for part in path[1:].split('/')]
+    else:
+        parts = path.split('.')
+
+    target, parts = parts[0], parts[1:]
+    if target == 'system':
+        if len(parts) != 2 or not all(parts):
+            raise PatchError(f'系统配置路径必须为system.section.key格式: {path}')
+    elif target == 'config':
+        if not parts:
+            raise PatchError(f'用户配置路径不能为空: {path}')
+    else:
+        raise PatchError(f'不支持的配置路径格式: {path}')
+    return target, parts
+
+
+def dotted_path(target, parts):
+    """将路径片段转换为点分路径，用于变更通知"""
+    return '.'.join([target] + [str(part) for part in parts])
+
+
+def json_pointer(parts):
+    """将路径片段转换为JSON Pointer，用于返回给客户端的JSON Patch"""
+    return ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in parts)
+
+
+def _apply_system(system_config, op, section, key, value):
+    exists = system_config.has_section(section) and system_config.has_option(section, key)
+
+    if op == 'test':
+        if not exists or system_config.get(section, key) != str(value):
+            raise PatchError(f'配置项system.{section}.{key}的值与期望不符')
+        return False
+    if op == 'remove':
+        if not exists:
+            raise PatchError(f'找不到配置项: system.{section}.{key}')
+        system_config.remove_option(section, key)
+        return True
+    if op == 'replace' and not exists:
+        raise PatchError(f'找不到配置项: system.{section}.{key}')
+
+    if not system_config.has_section(section):
+        system_config.add_section(section)
+    system_config[section][key] = str(value)
+    return True
+
+
+def _list_index(container, part, allow_end):
+    if allow_end and part == '-':
+        return len(container)
+    try:
+        index = int(part)
+    except ValueError:
+        raise PatchError(f'无效的数组下标: {part}')
+    upper = len(container) if allow_end else len(container) - 1
+    if index < 0 or index > upper:
+        raise PatchError(f'数组下标越界: {part}')
+    return index
+
+
+def _apply_config(config_json, op, parts, value):
+    parent = config_json
+    for i, part in enumerate(parts[:-1]):
+        if isinstance(parent, list):
+            parent = parent[_list_index(parent, part, False)]
+        elif isinstance(parent, dict):
+            if part not in parent:
+                if op != 'set':
+                    raise PatchError(f'路径不存在: config.{".".join(parts[:i + 1])}')
+                parent[part] = {}
+            parent = parent[part]
+        else:
+            raise PatchError(f'路径不存在: config.{".".join(parts[:i + 1])}')
+
+    last = parts[-1]
+    if isinstance(parent, list):
+        index = _list_index(parent, last, op in ('set', 'add'))
+        if op == 'test':
+            if parent[index] != value:
+                raise PatchError(f'配置项config.{".".join(parts)}的值与期望不符')
+            return False
+        if op == 'remove':
+            del parent[index]
+        elif op == 'add' or index == len(parent):
+            parent.insert(index, value)
+        else:
+            parent[index] = value
+        return True
+
+    if not isinstance(parent, dict):
+        raise PatchError(f'路径不存在: config.{".".join(parts[:-1])}')
+    exists = last in parent
+    if op == 'test':
+        if not exists or parent[last] != value:
+            raise PatchError(f'配置项config.{".".join(parts)}的值与期望不符')
+        return False
+    if op in ('remove', 'replace') and not exists:
+        raise PatchError(f'找不到配置项: config.{".".join(parts)}')
+    if op == 'remove':
+        del parent[last]
+    else:
+        parent[last] = value
+    return True
+
+
+def apply_operations(system_config, config_json, operations):
+    """
+    依次应用修改操作，任一操作失败时停止
+
+    Args:
+        system_config: system.conf的INI文档，会被原地修改
+        config_json: config.json的字典，会被原地修改
+        operations: 操作列表，每个操作为{path, value}或{op, path, value}
+
+    Returns:
+        (是否全部成功, 每个操作的结果列表, 被修改的文件集合, 变更的点分路径列表)
+    """
+    results = []
+    touched = set()
+    changed_paths = []
+    failed = False
+
+    for i, operation in enumerate(operations):
+        if failed:
+            results.append({'index': i, 'success': False, 'message': '前面的操作失败，未执行'})
+            continue
+        try:
+            if not isinstance(operation, dict):
+                raise PatchError('操作必须是对象')
+            op = operation.get('op', 'set')
+            if op not in SUPPORTED_OPS:
+                raise PatchError(f'不支持的操作: {op}')
+            if op != 'remove' and 'value' not in operation:
+                raise PatchError('缺少value字段')
+            target, parts = parse_path(operation.get('path'))
+            value = copy.deepcopy(operation.get('value'))
+
+            if target == 'system':
+                modified = _apply_system(system_config, op, parts[0], parts[1], value)
+            else:
+                modified = _apply_config(config_json, op, parts, value)
+
+            if modified:
+                touched.add(target)
+                changed_paths.append(dotted_path(target, parts))
+            results.append({'index': i, 'op': op, 'path': operation.get('path'), 'success': True})
+        except PatchError as e:
+            failed = True
+            results.append({
+                'index': i,
+                'op': operation.get('op', 'set') if isinstance(operation, dict) else None,
+                'path': operation.get('path') if isinstance(operation, dict) else None,
+                'success': False,
+                'message': str(e)
+            })
+
+    return not failed, results, touched, changed_paths
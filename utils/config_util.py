@@ -7,6 +7,12 @@ import functools
 from threading import Lock
 import threading
 
+try:
+    # 可选依赖，安装后从API加载配置时使用MessagePack格式，解码更快
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # 线程本地存储，用于支持多个项目配置
 _thread_local = threading.local()
 
@@ -77,6 +83,19 @@ def set_api_config(base_url=None, api_key=None, project_id=None):
     if project_id:
         API_CONFIG['PROJECT_ID'] = project_id
 
+def _api_accept_header():
+    """获取API请求的Accept请求头，安装了msgpack时优先请求MessagePack格式"""
+    if msgpack is not None:
+        return 'application/msgpack, application/json;q=0.9'
+    return 'application/json'
+
+def _decode_api_response(response):
+    """根据响应的Content-Type解码API响应"""
+    content_type = response.headers.get('Content-Type', '')
+    if msgpack is not None and content_type.startswith('application/msgpack'):
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
+
 def load_config_from_api(project_id=None):
     """
     从API加载配置
@@ -99,7 +118,8 @@ def load_config_from_api(project_id=None):
     # 设置请求头
     headers = {
         'X-API-Key': API_CONFIG['API_KEY'],
-        'Content-Type': 'application/json'
+        'Content-Type': 'application/json',
+        'Accept': _api_accept_header()
     }
     
     try:
@@ -108,7 +128,7 @@ def load_config_from_api(project_id=None):
         
         # 检查响应状态
         if response.status_code == 200:
-            result = response.json()
+            result = _decode_api_response(response)
             if result.get('success'):
                 # 提取配置数据
                 project_data = result.get('project', {})
@@ -553,14 +573,15 @@ def get_value_from_config(config_dict, key, default=None):
             except (KeyError, TypeError):
                 return default
         elif section == 'system':
-            # 从system.conf获取配置
+            # 从system.conf获取配置，system.section.key格式可访问[key]以外的区段
             try:
                 if key_name in config_dict:
                     return config_dict[key_name]
                 else:
                     system_config = config_dict.get('system_config')
-                    if system_config and system_config.has_option('key', key_name):
-                        return system_config.get('key', key_name)
+                    section_name, option = key_name.split('.', 1) if '.' in key_name else ('key', key_name)
+                    if system_config and system_config.has_option(section_name, option):
+                        return system_config.get(section_name, option)
                     return default
             except KeyError:
                 return default
@@ -571,3 +592,85 @@ def get_value_from_config(config_dict, key, default=None):
         except KeyError:
             return default
 
+def build_config_index(system_config, config):
+    """
+    构建扁平化的配置索引，将每个点分路径映射到对应的值
+    
+    索引包含system.<section>.<key>、config.a.b.c（含中间层级），
+    以及[key]区段的简写形式system.<key>和<key>
+    
+    Args:
+        system_config: system.conf的字典形式 {section: {key: value}}
+        config: config.json的内容
+    
+    Returns:
+        {点分路径: 值} 字典
+    """
+    index = {}
+    
+    for section, items in (system_config or {}).items():
+        for key, value in items.items():
+            index[f'system.{section}.{key}'] = value
+    
+    # [key]区段的简写形式，与get_value_from_config的规则保持一致
+    for key, value in (system_config or {}).get('key', {}).items():
+        index.setdefault(f'system.{key}', value)
+        index.setdefault(key, value)
+    
+    # 深度优先展开config.json中的所有字典层级
+    stack = [('config', config)] if isinstance(config, dict) else []
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            path = f'{prefix}.{key}'
+            index[path] = value
+            if isinstance(value, dict):
+                stack.append((path, value))
+    
+    return index
+
+def flatten_config_leaves(system_config, config):
+    """
+    将配置展开为叶子节点，只包含规范路径system.<section>.<key>和config.a.b.c
+    
+    空字典（包括没有配置项的区段system.<section>）和非字典值视为叶子节点，
+    用于比较两个版本之间的差异
+    
+    Args:
+        system_config: system.conf的字典形式 {section: {key: value}}
+        config: config.json的内容
+    
+    Returns:
+        {点分路径: 值} 字典
+    """
+    leaves = {}
+    
+    for section, items in (system_config or {}).items():
+        if not items:
+            leaves[f'system.{section}'] = {}
+        for key, value in items.items():
+            leaves[f'system.{section}.{key}'] = value
+    
+    stack = [('config', config)] if isinstance(config, dict) else []
+    while stack:
+        prefix, node = stack.pop()
+        for key, value in node.items():
+            path = f'{prefix}.{key}'
+            if isinstance(value, dict) and value:
+                stack.append((path, value))
+            else:
+                leaves[path] = value
+    
+    return leaves
+
+def diff_config_leaves(old_leaves, new_leaves):
+    """
+    比较两个版本的叶子节点
+    
+    Returns:
+        新增、修改或删除的路径列表
+    """
+    changed = [path for path, value in new_leaves.items()
+               if path not in old_leaves or old_leaves[path] != value]
+    deleted = [path for path in old_leaves if path not in new_leaves]
+    return changed + deleted
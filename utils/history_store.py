@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置历史模块
+
+为每个项目维护单调递增的修订号，并记录每次修订变更的配置路径，
+用于客户端按修订号增量同步配置
+"""
+
+import os
+import json
+import datetime
+import sqlite3
+import threading
+
+# 数据库文件路径
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'history.db')
+
+# 每个项目保留的修订记录数量，更早的记录被压缩，增量同步时返回完整快照
+HISTORY_LIMIT = 1000
+
+# 确保数据目录存在
+os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+
+# 修订号分配锁，保证同一进程内修订号单调递增
+_lock = threading.Lock()
+
+# 项目ID -> 当前修订号
+_revisions = {}
+
+
+def init_db():
+    """初始化数据库，创建修订记录表"""
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+
+    # 创建修订记录表，paths为NULL表示变更范围未知
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS revisions (
+        project_id TEXT NOT NULL,
+        revision INTEGER NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        paths TEXT,
+        PRIMARY KEY (project_id, revision)
+    )
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
+def get_revision(project_id):
+    """
+    获取项目当前修订号
+
+    Args:
+        project_id: 项目ID
+
+    Returns:
+        当前修订号，从未修改过的项目为0
+    """
+    revision = _revisions.get(project_id)
+    if revision is not None:
+        return revision
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute('SELECT MAX(revision) FROM revisions WHERE project_id = ?', (project_id,)).fetchone()
+    finally:
+        conn.close()
+    revision = row[0] or 0
+    with _lock:
+        _revisions.setdefault(project_id, revision)
+    return _revisions[project_id]
+
+
+def record_revision(project_id, paths=None):
+    """
+    提交一次修订
+
+    Args:
+        project_id: 项目ID
+        paths: 本次修订变更或删除的配置路径列表，None表示未知
+
+    Returns:
+        新的修订号
+    """
+    get_revision(project_id)
+    with _lock:
+        revision = _revisions[project_id] + 1
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            conn.execute('''
+            INSERT INTO revisions (project_id, revision, created_at, paths)
+            VALUES (?, ?, ?, ?)
+            ''', (
+                project_id,
+                revision,
+                datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                json.dumps(sorted(set(paths)), ensure_ascii=False) if paths is not None else None
+            ))
+
+            # 压缩过早的修订记录
+            if revision > HISTORY_LIMIT and revision % 100 == 0:
+                conn.execute('DELETE FROM revisions WHERE project_id = ? AND revision <= ?',
+                             (project_id, revision - HISTORY_LIMIT))
+            conn.commit()
+        finally:
+            conn.close()
+        _revisions[project_id] = revision
+    return revision
+
+
+def get_changed_paths(project_id, since):
+    """
+    获取指定修订号之后变更过的配置路径
+
+    Args:
+        project_id: 项目ID
+        since: 客户端已同步的修订号
+
+    Returns:
+        变更路径集合；历史已被压缩或变更范围未知时返回None，调用方应返回完整快照
+    """
+    current = get_revision(project_id)
+    if since > current or since < 0:
+        return None
+    if since == current:
+        return set()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute('''
+        SELECT revision, paths FROM revisions
+        WHERE project_id = ? AND revision > ? AND revision <= ?
+        ORDER BY revision
+        ''', (project_id, since, current)).fetchall()
+    finally:
+        conn.close()
+
+    # 中间有修订被压缩
+    if len(rows) != current - since:
+        return None
+
+    paths = set()
+    for _, row_paths in rows:
+        if row_paths is None:
+            return None
+        paths.update(json.loads(row_paths))
+    return paths
+
+
+def get_revision_paths(project_id, revisions):
+    """
+    获取指定修订各自变更的配置路径
+
+    Args:
+        project_id: 项目ID
+        revisions: 修订号列表
+
+    Returns:
+        修订号 -> 变更路径列表的字典，变更范围未知或记录已被压缩的修订不在字典中
+    """
+    if not revisions:
+        return {}
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute(f'''
+        SELECT revision, paths FROM revisions
+        WHERE project_id = ? AND revision IN ({', '.join('?' * len(revisions))})
+        ''', (project_id, *revisions)).fetchall()
+    finally:
+        conn.close()
+    return {revision: json.loads(paths) for revision, paths in rows if paths is not None}
+
+
+def paths_overlap(path, other):
+    """判断两个点分配置路径是否相同或互为父子路径"""
+    return path == other or path.startswith(other + '.') or other.startswith(path + '.')
+
+
+def find_conflicts(project_id, base_revision, paths):
+    """
+    检查基于指定修订号的修改是否与之后的修订冲突
+
+    Args:
+        project_id: 项目ID
+        base_revision: 客户端读取配置时的修订号
+        paths: 本次修改涉及的配置路径列表
+
+    Returns:
+        冲突的配置路径列表，没有冲突时为空列表；
+        修订号无效或之后的变更范围未知时，所有路径都视为冲突
+    """
+    changed = get_changed_paths(project_id, base_revision)
+    if changed is None:
+        return sorted(set(paths))
+    return sorted({path for path in paths if any(paths_overlap(path, other) for other in changed)})
+
+
+def drop_project(project_id):
+    """删除项目的所有修订记录"""
+    with _lock:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            conn.execute('DELETE FROM revisions WHERE project_id = ?', (project_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        _revisions.pop(project_id, None)
+
+
+# 初始化数据库
+init_db()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HyperLogLog基数估计模块
+
+用固定大小的寄存器数组估计集合中不同元素的数量，多个草图可以按寄存器取最大值合并，
+用于按时间桶统计唯一IP：任意时间范围的唯一IP数由范围内各个桶的草图合并后估计。
+使用2^8个寄存器，每个草图256字节，标准误差约6.5%
+"""
+
+import math
+import hashlib
+
+# 寄存器索引位数
+PRECISION = 8
+
+REGISTERS = 1 << PRECISION
+
+_VALUE_BITS = 64 - PRECISION
+
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+
+
+def new_sketch():
+    """创建空草图"""
+    return bytearray(REGISTERS)
+
+
+def hash_value(value):
+    """
+    计算元素对应的寄存器
+
+    Args:
+        value: 元素（字符串）
+
+    Returns:
+        (寄存器索引, 寄存器取值)
+    """
+    hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+    rest = hashed & ((1 << _VALUE_BITS) - 1)
+    # 剩余位中第一个1出现的位置
+    return hashed >> _VALUE_BITS, _VALUE_BITS - rest.bit_length() + 1
+
+
+def add(sketch, value):
+    """
+    向草图中加入一个元素，原地修改
+
+    Args:
+        sketch: new_sketch创建的bytearray
+        value: 元素（字符串）
+    """
+    index, rank = hash_value(value)
+    if rank > sketch[index]:
+        sketch[index] = rank
+
+
+def update(sketch, registers):
+    """
+    按稀疏的寄存器更新草图，比先生成完整草图再合并快得多
+
+    Args:
+        sketch: 草图，可以为None
+        registers: 寄存器索引和取值交替排列的bytes
+
+    Returns:
+        更新后的草图（bytes）
+    """
+    result = bytearray(sketch) if sketch is not None else new_sketch()
+    for i in range(0, len(registers), 2):
+        index, rank = registers[i], registers[i + 1]
+        if rank > result[index]:
+            result[index] = rank
+    return bytes(result)
+
+
+def merge(a, b):
+    """
+    合并两个草图
+
+    Args:
+        a: 草图，可以为None
+        b: 草图，可以为None
+
+    Returns:
+        合并后的草图（bytes），两者都为None时返回None
+    """
+    if a is None:
+        return bytes(b) if b is not None else None
+    if b is None:
+        return bytes(a)
+    return bytes(map(max, a, b))
+
+
+def estimate(sketch):
+    """
+    估计草图中不同元素的数量
+
+    Returns:
+        估计值（整数），草图为None时返回0
+    """
+    if sketch is None:
+        return 0
+    raw = _ALPHA * REGISTERS * REGISTERS / sum(2.0 ** -register for register in sketch)
+    zeros = sketch.count(0)
+    # 元素较少时使用线性计数
+    if raw <= 2.5 * REGISTERS and zeros:
+        return round(REGISTERS * math.log(REGISTERS / zeros))
+    return round(raw)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+INI文档模块
+
+保留注释、顺序和格式的system.conf文档模型：解析时保留每一行的原文，
+修改单个配置项只替换该项所在的行，写回时按原样拼接各行，不重新格式化整个文件。
+读取规则与ConfigParser的默认设置一致（#和;开头的整行注释、缩进的续行、
+键名不区分大小写、重复的区段或键视为错误），但不做插值，也不对DEFAULT区段做继承处理
+"""
+
+
+class IniParseError(ValueError):
+    """system.conf格式无效"""
+
+
+class _Option:
+    """配置项：键名原文、取值以及在文件中占用的行（含续行）"""
+
+    __slots__ = ('name', 'value', 'lines', 'prefix')
+
+    def __init__(self, name, value, lines, prefix):
+        self.name = name
+        self.value = value
+        self.lines = lines
+        # 取值之前的部分（缩进、键名、分隔符及其后的空白），修改时原样保留
+        self.prefix = prefix
+
+
+class _Section:
+    """区段：标题行以及其后的配置项和注释/空行，按文件中的顺序排列"""
+
+    __slots__ = ('name', 'header', 'items', 'options')
+
+    def __init__(self, name, header):
+        self.name = name
+        self.header = header
+        # 元素为_Option或原始行字符串
+        self.items = []
+        # 小写键名 -> _Option
+        self.options = {}
+
+
+class SectionProxy:
+    """按ConfigParser的方式访问单个区段：document[section][key]"""
+
+    def __init__(self, document, name):
+        self._document = document
+        self._name = name
+
+    def __getitem__(self, key):
+        return self._document.get(self._name, key)
+
+    def __setitem__(self, key, value):
+        self._document.set(self._name, key, value)
+
+    def __delitem__(self, key):
+        if not self._document.remove_option(self._name, key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._document.has_option(self._name, key)
+
+    def __iter__(self):
+        return iter(self._document.options(self._name))
+
+    def __len__(self):
+        return len(self._document.options(self._name))
+
+    def get(self, key, fallback=None):
+        return self._document.get(self._name, key, fallback=fallback)
+
+    def keys(self):
+        return self._document.options(self._name)
+
+    def items(self):
+        return self._document.items(self._name)
+
+    @property
+    def name(self):
+        return self._name
+
+
+_UNSET = object()
+
+
+class IniDocument:
+    """
+    保留注释和格式的INI文档，提供app.py用到的ConfigParser接口子集
+
+    read/read_string替换整个文档的内容，write写出修改后的原文
+    """
+
+    def __init__(self):
+        self._head = []
+        self._sections = {}
+
+    @staticmethod
+    def optionxform(name):
+        return name.lower()
+
+    # 读取
+
+    def read(self, path, encoding='utf-8'):
+        """
+        读取文件，文件不存在时保持文档不变（与ConfigParser一致）
+
+        Returns:
+            成功读取的文件路径列表
+        """
+        try:
+            with open(path, 'r', encoding=encoding) as f:
+                text = f.read()
+        except FileNotFoundError:
+            return []
+        self.read_string(text)
+        return [path]
+
+    def read_string(self, text):
+        """
+        解析文本并替换文档内容
+
+        Raises:
+            IniParseError: 缺少区段标题、存在无法解析的行或重复的区段/键
+        """
+        head = []
+        sections = {}
+        section = None
+        option = None
+        # 当前配置项所在行的缩进，更深缩进的行为续行
+        indent_level = 0
+        # 配置项之后尚未确定归属的注释和空行，后面出现续行时属于该配置项
+        pending = []
+
+        for lineno, line in enumerate(text.splitlines(keepends=True), 1):
+            stripped = line.strip()
+            if not stripped or stripped[0] in '#;':
+                if option is not None:
+                    pending.append(line)
+                elif section is not None:
+                    section.items.append(line)
+                else:
+                    head.append(line)
+                continue
+
+            indent = len(line) - len(line.lstrip())
+            if option is not None and indent > indent_level:
+                # 续行：中间的空行作为值中的空行保留，注释行跳过
+                option.value.extend('' for pending_line in pending if not pending_line.strip())
+                option.value.append(stripped)
+                option.lines.extend(pending)
+                option.lines.append(line)
+                pending = []
+                continue
+
+            if option is not None:
+                section.items.extend(pending)
+                pending = []
+                option = None
+
+            if stripped[0] == '[':
+                end = stripped.rfind(']')
+                if end <= 1:
+                    raise IniParseError(f'第{lineno}行无法解析: {line!r}')
+                name = stripped[1:end]
+                if name in sections:
+                    raise IniParseError(f'第{lineno}行的区段已存在: {name}')
+                section = sections[name] = _Section(name, line)
+                continue
+
+            if section is None:
+                raise IniParseError(f'第{lineno}行之前缺少区段标题: {line!r}')
+
+            position = min((i for i in (line.find('='), line.find(':')) if i >= 0), default=-1)
+            name = line[:position].strip() if position >= 0 else ''
+            if not name:
+                raise IniParseError(f'第{lineno}行无法解析: {line!r}')
+            value_start = position + 1
+            while value_start < len(line) and line[value_start] in ' \t':
+                value_start += 1
+            key = self.optionxform(name)
+            if key in section.options:
+                raise IniParseError(f'第{lineno}行的键在区段{section.name}中已存在: {name}')
+            option = _Option(name, [line[value_start:].strip()], [line], line[:value_start])
+            section.options[key] = option
+            section.items.append(option)
+            indent_level = indent
+
+        if option is not None:
+            section.items.extend(pending)
+
+        for section in sections.values():
+            for option in section.options.values():
+                option.value = '\n'.join(option.value).rstrip()
+
+        self._head = head
+        self._sections = sections
+
+    # 查询
+
+    def sections(self):
+        return list(self._sections)
+
+    def has_section(self, section):
+        return section in self._sections
+
+    def _section(self, section):
+        try:
+            return self._sections[section]
+        except KeyError:
+            raise KeyError(section) from None
+
+    def options(self, section):
+        return list(self._section(section).options)
+
+    def has_option(self, section, option):
+        section = self._sections.get(section)
+        return section is not None and self.optionxform(option) in section.options
+
+    def get(self, section, option, *, raw=False, fallback=_UNSET):
+        """读取配置项的值，raw参数只为兼容ConfigParser，取值总是原文"""
+        section_obj = self._sections.get(section)
+        found = section_obj.options.get(self.optionxform(option)) if section_obj is not None else None
+        if found is None:
+            if fallback is not _UNSET:
+                return fallback
+            raise KeyError(f'{section}.{option}')
+        return found.value
+
+    def items(self, section):
+        return [(key, option.value) for key, option in self._section(section).options.items()]
+
+    def __getitem__(self, section):
+        self._section(section)
+        return SectionProxy(self, section)
+
+    def __contains__(self, section):
+        return section in self._sections
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    # 修改
+
+    def add_section(self, section):
+        """在文件末尾追加区段，与上一个区段之间空一行"""
+        if section in self._sections:
+            raise ValueError(f'区段已存在: {section}')
+        previous = next(reversed(self._sections.values()), None)
+        lines = previous.items if previous is not None else self._head
+        last = self._last_line(previous)
+        if last is not None:
+            if not last.endswith('\n'):
+                lines.append('\n')
+            if last.strip():
+                lines.append('\n')
+        new_section = self._sections[section] = _Section(section, f'[{section}]\n')
+        new_section.items.append('\n')
+
+    def remove_section(self, section):
+        """
+        删除区段及其配置项，区段末尾的注释通常说明下一个区段，保留在原处
+
+        Returns:
+            区段是否存在
+        """
+        if section not in self._sections:
+            return False
+        names = list(self._sections)
+        index = names.index(section)
+        removed = self._sections.pop(section)
+
+        last_option = max((i for i, item in enumerate(removed.items) if isinstance(item, _Option)), default=-1)
+        trailing = removed.items[last_option + 1:]
+        if any(line.strip() for line in trailing):
+            # 追加到被删除区段之前的区段（或文件开头）的末尾
+            previous = self._sections[names[index - 1]] if index > 0 else None
+            (previous.items if previous is not None else self._head).extend(trailing)
+        return True
+
+    def set(self, section, option, value):
+        """
+        设置配置项：已有的配置项只替换它所在的行，新配置项插入到区段最后一个配置项之后
+
+        Raises:
+            KeyError: 区段不存在
+            TypeError: 值不是字符串
+        """
+        if not isinstance(value, str):
+            raise TypeError('配置项的值必须是字符串')
+        section_obj = self._section(section)
+        key = self.optionxform(option)
+        existing = section_obj.options.get(key)
+        if existing is not None:
+            existing.lines = self._format(existing.prefix, value)
+            existing.value = value
+            return
+
+        new_option = _Option(option, value, None, f'{option} = ')
+        new_option.lines = self._format(new_option.prefix, value)
+        last_option = max((i for i, item in enumerate(section_obj.items) if isinstance(item, _Option)),
+                          default=-1)
+        if last_option >= 0 and not section_obj.items[last_option].lines[-1].endswith('\n'):
+            section_obj.items[last_option].lines[-1] += '\n'
+        section_obj.items.insert(last_option + 1, new_option)
+        section_obj.options[key] = new_option
+
+    def remove_option(self, section, option):
+        """
+        删除配置项所在的行
+
+        Returns:
+            配置项是否存在
+        """
+        section_obj = self._section(section)
+        removed = section_obj.options.pop(self.optionxform(option), None)
+        if removed is None:
+            return False
+        section_obj.items.remove(removed)
+        return True
+
+    @staticmethod
+    def _format(prefix, value):
+        # 多行值按ConfigParser的格式写成缩进的续行
+        return [prefix + value.replace('\n', '\n\t') + '\n']
+
+    # 写出
+
+    def _last_line(self, section):
+        if section is None:
+            return self._head[-1] if self._head else None
+        if not section.items:
+            return section.header
+        item = section.items[-1]
+        return item.lines[-1] if isinstance(item, _Option) else item
+
+    def to_string(self):
+        parts = list(self._head)
+        for section in self._sections.values():
+            parts.append(section.header)
+            for item in section.items:
+                if isinstance(item, _Option):
+                    parts.extend(item.lines)
+                else:
+                    parts.append(item)
+        return ''.join(parts)
+
+    def write(self, f):
+        f.write(self.to_string())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+项目注册表模块
+
+在内存中维护所有项目的元数据（id、名称、描述、创建时间、路径等），
+启动时从磁盘加载一次，之后由写入路径主动更新，
+并在项目目录的修改时间变化时从磁盘刷新，避免每次请求都遍历目录、解析project.json
+"""
+
+import os
+import json
+import threading
+
+
+class ProjectRegistry:
+    """项目注册表，列表读取返回不可变快照"""
+
+    def __init__(self, projects_dir):
+        """
+        初始化项目注册表
+
+        Args:
+            projects_dir: 存放所有项目的目录
+        """
+        self.projects_dir = projects_dir
+        self._lock = threading.RLock()
+        # 项目ID -> 项目元数据
+        self._projects = {}
+        # 项目ID -> project.json的(mtime_ns, size)，用于增量刷新
+        self._signatures = {}
+        # 列表快照，写入时整体替换，读取时无需加锁
+        self._snapshot = ()
+        self._dir_mtime = None
+        # 每次内容变化时递增，可用于判断快照是否变化
+        self.version = 0
+
+    @staticmethod
+    def _build_record(project_id, project_dir, project_config):
+        """根据project.json内容构建注册表记录"""
+        return {
+            'id': project_id,
+            'name': project_config.get('name', project_id),
+            'description': project_config.get('description', ''),
+            'created_at': project_config.get('created_at', ''),
+            'updated_at': project_config.get('updated_at', ''),
+            'path': project_config.get('path', project_dir)
+        }
+
+    @staticmethod
+    def _stat_signature(path):
+        """获取文件签名，文件不存在时返回None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_project(self, project_id):
+        """从磁盘读取单个项目，返回(记录, 签名)，无法读取时返回(None, None)"""
+        project_dir = os.path.join(self.projects_dir, project_id)
+        project_config_path = os.path.join(project_dir, 'project.json')
+        signature = self._stat_signature(project_config_path)
+        if signature is None or not os.path.isdir(project_dir):
+            return None, None
+        try:
+            with open(project_config_path, 'r', encoding='utf-8') as f:
+                project_config = json.load(f)
+        except Exception:
+            # 跳过无法读取的项目
+            return None, None
+        return self._build_record(project_id, project_dir, project_config), signature
+
+    def _publish(self):
+        """重建列表快照，调用方需持有锁"""
+        self._snapshot = tuple(self._projects.values())
+        self.version += 1
+
+    def load(self):
+        """
+        从磁盘完整加载项目列表
+
+        未变化的project.json（签名相同）直接复用已有记录
+        """
+        with self._lock:
+            try:
+                self._dir_mtime = os.stat(self.projects_dir).st_mtime_ns
+                entries = os.listdir(self.projects_dir)
+            except OSError:
+                self._dir_mtime = None
+                entries = []
+
+            projects = {}
+            signatures = {}
+            for project_id in entries:
+                project_config_path = os.path.join(self.projects_dir, project_id, 'project.json')
+                signature = self._stat_signature(project_config_path)
+                if signature is not None and self._signatures.get(project_id) == signature:
+                    projects[project_id] = self._projects[project_id]
+                    signatures[project_id] = signature
+                    continue
+                record, signature = self._read_project(project_id)
+                if record:
+                    projects[project_id] = record
+                    signatures[project_id] = signature
+
+            if projects != self._projects:
+                self._projects = projects
+                self._publish()
+            self._signatures = signatures
+
+    def refresh_if_changed(self):
+        """项目目录的修改时间变化时（有项目被外部添加或删除）重新加载"""
+        try:
+            dir_mtime = os.stat(self.projects_dir).st_mtime_ns
+        except OSError:
+            dir_mtime = None
+        if dir_mtime != self._dir_mtime:
+            self.load()
+
+    def list_projects(self):
+        """
+        获取项目列表快照
+
+        Returns:
+            项目记录元组，调用方不应修改其中的字典
+        """
+        self.refresh_if_changed()
+        return self._snapshot
+
+    def get(self, project_id):
+        """
+        获取单个项目记录，project.json被外部修改时重新读取
+
+        Args:
+            project_id: 项目ID
+
+        Returns:
+            项目记录，不存在时返回None
+        """
+        project_config_path = os.path.join(self.projects_dir, project_id, 'project.json')
+        signature = self._stat_signature(project_config_path)
+        with self._lock:
+            if signature is not None and self._signatures.get(project_id) == signature:
+                return self._projects.get(project_id)
+        self.refresh_project(project_id)
+        return self._projects.get(project_id)
+
+    def refresh_project(self, project_id):
+        """从磁盘重新读取单个项目，项目不存在时将其移除"""
+        record, signature = self._read_project(project_id)
+        with self._lock:
+            if record is None:
+                self._remove_locked(project_id)
+                return
+            self._signatures[project_id] = signature
+            if self._projects.get(project_id) != record:
+                self._projects[project_id] = record
+                self._publish()
+
+    def upsert(self, project_id, project_config):
+        """
+        写入路径保存project.json后调用，更新内存中的记录
+
+        Args:
+            project_id: 项目ID
+            project_config: 刚写入磁盘的project.json内容
+        """
+        project_dir = os.path.join(self.projects_dir, project_id)
+        record = self._build_record(project_id, project_dir, project_config)
+        signature = self._stat_signature(os.path.join(project_dir, 'project.json'))
+        with self._lock:
+            if signature is not None:
+                self._signatures[project_id] = signature
+            if self._projects.get(project_id) != record:
+                self._projects[project_id] = record
+                self._publish()
+            self._sync_dir_mtime()
+
+    def remove(self, project_id):
+        """删除项目后调用，从注册表中移除记录"""
+        with self._lock:
+            self._remove_locked(project_id)
+            self._sync_dir_mtime()
+
+    def _remove_locked(self, project_id):
+        self._signatures.pop(project_id, None)
+        if self._projects.pop(project_id, None) is not None:
+            self._publish()
+
+    def _sync_dir_mtime(self):
+        """记录自身操作后的目录修改时间，避免随后触发一次多余的全量刷新"""
+        try:
+            self._dir_mtime = os.stat(self.projects_dir).st_mtime_ns
+        except OSError:
+            self._dir_mtime = None
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+响应序列化格式模块
+
+除JSON外，客户端可以通过Accept请求头要求返回MessagePack格式，
+减少弱硬件客户端的解码开销。msgpack为可选依赖，未安装时只提供JSON
+"""
+
+import threading
+from collections import OrderedDict
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# 支持的响应格式，第一个为默认格式
+MIMETYPES = (JSON_MIMETYPE, MSGPACK_MIMETYPE) if msgpack is not None else (JSON_MIMETYPE,)
+
+# 缓存的MessagePack编码结果数量上限
+CACHE_SIZE = 512
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+
+
+def encode_msgpack(data, cache_key=None):
+    """
+    将数据编码为MessagePack
+
+    Args:
+        data: 要编码的数据
+        cache_key: 缓存键（如JSON响应的ETag），为None时不缓存
+
+    Returns:
+        编码后的字节串
+    """
+    if cache_key is not None:
+        with _lock:
+            cached = _cache.get(cache_key)
+            if cached is not None:
+                _cache.move_to_end(cache_key)
+                return cached
+
+    packed = msgpack.packb(data, use_bin_type=True)
+
+    if cache_key is not None:
+        with _lock:
+            _cache[cache_key] = packed
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return packed
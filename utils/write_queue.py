@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+配置写入队列模块
+
+按项目排队配置修改：短时间窗口内到达的多个修改合并为一次串行的
+读取-修改-写入（一次备份、一次fsync），写入落盘后再唤醒每个等待的请求。
+同一项目的写入互斥执行，避免并发请求互相覆盖导致修改丢失
+"""
+
+import time
+import threading
+
+
+class EditRejected(Exception):
+    """修改无法应用，不影响同一批次中的其他修改"""
+
+    def __init__(self, message, status_code=400, payload=None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.payload = payload or {}
+
+
+class _Batch:
+    """一批待提交的修改"""
+
+    def __init__(self):
+        self.edits = []
+        self.results = None
+        self.done = threading.Event()
+
+
+class WriteQueue:
+    """按项目合并提交修改"""
+
+    def __init__(self, commit, window=0.002):
+        """
+        初始化写入队列
+
+        Args:
+            commit: 提交函数commit(project_id, edits)，返回与edits一一对应的结果列表，
+                    失败的修改对应的结果为异常对象
+            window: 第一个修改到达后等待合并后续修改的秒数
+        """
+        self.commit = commit
+        self.window = window
+        self._lock = threading.Lock()
+        # 项目ID -> 尚未开始提交的批次
+        self._pending = {}
+        # 项目ID -> 提交锁，保证同一项目同一时间只有一个批次在读写文件
+        self._commit_locks = {}
+        self.stats = {'batches': 0, 'edits': 0}
+
+    def _commit_lock(self, project_id):
+        with self._lock:
+            lock = self._commit_locks.get(project_id)
+            if lock is None:
+                lock = self._commit_locks[project_id] = threading.Lock()
+            return lock
+
+    def submit(self, project_id, edit):
+        """
+        提交一个修改并等待其写入完成
+
+        Args:
+            project_id: 项目ID
+            edit: 修改函数，由提交函数在持有项目写锁时调用
+
+        Returns:
+            修改函数的返回值
+
+        Raises:
+            修改函数或提交过程中抛出的异常
+        """
+        with self._lock:
+            batch = self._pending.get(project_id)
+            leader = batch is None
+            if leader:
+                batch = self._pending[project_id] = _Batch()
+            index = len(batch.edits)
+            batch.edits.append(edit)
+
+        if leader:
+            # 等待合并窗口内的其他修改，上一个批次仍在写入时新的修改也会继续并入本批次
+            if self.window:
+                time.sleep(self.window)
+            with self._commit_lock(project_id):
+                with self._lock:
+                    self._pending.pop(project_id, None)
+                    edits = list(batch.edits)
+                try:
+                    batch.results = self.commit(project_id, edits)
+                except Exception as e:
+                    batch.results = [e] * len(edits)
+                # 不同项目的批次并发提交，计数在全局锁内更新
+                with self._lock:
+                    self.stats['batches'] += 1
+                    self.stats['edits'] += len(edits)
+            batch.done.set()
+        else:
+            batch.done.wait()
+
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result